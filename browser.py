@@ -3,41 +3,94 @@ import psutil
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLineEdit, QToolBar, 
                            QAction, QStatusBar, QMessageBox, QLabel, QVBoxLayout, 
                            QWidget, QStyle, QDialog, QPushButton, QHBoxLayout,
-                           QProgressBar, QGroupBox)
+                           QProgressBar, QGroupBox, QCheckBox, QSpinBox)
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
 from PyQt5.QtCore import QUrl, pyqtSlot, QTimer, Qt, QSize
 from PyQt5.QtGui import QIcon, QPalette, QColor, QFont
 from datetime import datetime
 import json
 import os
+import threading
+import time
+from urllib.parse import urlparse
 
 # Import utility modules
-from utils.content_filter import is_safe_url, profanity
+from utils.content_filter import (is_safe_url, check_url, is_explicitly_allowed,
+                                  set_active_profile, profanity)
 from utils.history_manager import load_history, save_history
+from utils.screen_time_manager import load_screen_time, save_screen_time
 from utils.parental_controls import ParentalControlsDialog
 from utils.screen_time import ScreenTimeDialog
+from utils.analytics import ReportBuilder
+from utils.browser_profile import (HOME_URL, load_profile_settings, create_profile,
+                                   CachePreloader, active_child)
+from utils import tracing
+from utils.policy_sync import load_sync_config, PolicySyncClient
+from utils.audit_log import (AuditLogWriter, load_audit_log, SOURCE_LINK, SOURCE_TYPED,
+                             SOURCE_SUBRESOURCE, SOURCE_CLASSIFIER)
+from utils.link_prefetcher import LinkPrefetcher, UNSAFE_LABELS, EXTRACT_LINKS_JS
+from utils.domain_stats import DomainCounters, RESOURCE_SIZES_JS
+from utils.table_models import KeyedTableModel, FilterableTable, format_megabytes
 
-def load_screen_time():
-    """Load screen time data from file."""
-    try:
-        with open('screen_time.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+# The content classifier needs extra packages (requests, beautifulsoup4, transformers)
+try:
+    from utils.ai_utils import classify_text_content, fetch_page_text
+except ImportError:
+    classify_text_content = fetch_page_text = None
 
-def save_screen_time(data):
-    """Save screen time data to file."""
-    with open('screen_time.json', 'w') as f:
-        json.dump(data, f, indent=2)
+# Don't repeat the "not safe" warning for a host blocked again within this many seconds
+BLOCK_WARNING_WINDOW = 10
+
+class SafeUrlRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    """Blocks images, scripts and other subresources served from blocked domains."""
+
+    def __init__(self, window, audit_log, domain_counters):
+        super().__init__(window)
+        self.window = window
+        self.audit_log = audit_log
+        self.domain_counters = domain_counters
+
+    def interceptRequest(self, info):
+        url = info.requestUrl()
+        if url.scheme() not in ('http', 'https'):
+            return
+        # Installed with setUrlRequestInterceptor, so this runs on the UI thread.
+        # Main frame loads are checked by SafeWebPage instead
+        if info.resourceType() == QWebEngineUrlRequestInfo.ResourceTypeMainFrame:
+            self.domain_counters.add_request(url.host())
+            return
+        url_string = url.toString()
+        safe, rule = check_url(url_string, self.window.safe_mode)
+        self.domain_counters.add_request(url.host(), blocked=not safe)
+        if not safe:
+            info.block(True)
+            self.audit_log.record(url_string, rule, SOURCE_SUBRESOURCE)
 
 class SafeWebPage(QWebEnginePage):
+    def __init__(self, profile, parent=None, window=None):
+        super().__init__(profile, parent)
+        # The view is moved into the window's central widget, so keep the window itself
+        self.window = window
+
     def acceptNavigationRequest(self, url, _type, isMainFrame):
-        if _type == QWebEnginePage.NavigationType.NavigationTypeLinkClicked:
-            if not is_safe_url(url.toString(), self.parent().parent().safe_mode):
-                QMessageBox.warning(None, "Access Denied", 
-                    "This website is not safe for children!")
-                return False
-        return super().acceptNavigationRequest(url, _type, isMainFrame)
+        with tracing.span("acceptNavigationRequest", type=int(_type)):
+            if _type == QWebEnginePage.NavigationType.NavigationTypeLinkClicked:
+                window = self.window
+                safe, rule = check_url(url.toString(), window.safe_mode)
+                source = SOURCE_LINK
+                if safe and window.safe_mode and not is_explicitly_allowed(url.toString()):
+                    # Use the verdict prefetched while the child was reading the page
+                    label = window.prefetcher.verdict(url.toString())
+                    if label in UNSAFE_LABELS:
+                        safe, rule, source = False, f"classifier:{label}", SOURCE_CLASSIFIER
+                if not safe:
+                    if window.record_block(url.toString(), rule, source):
+                        with tracing.span("QMessageBox"):
+                            QMessageBox.warning(None, "Access Denied", 
+                                "This website is not safe for children!")
+                    return False
+            return super().acceptNavigationRequest(url, _type, isMainFrame)
 
     def navigate_to_url(self):
         url = self.url_bar.text()
@@ -145,7 +198,7 @@ class PerformanceMetricsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Performance Metrics")
-        self.setGeometry(200, 200, 400, 500)
+        self.setGeometry(200, 200, 500, 800)
         
         # Main layout
         layout = QVBoxLayout()
@@ -186,7 +239,7 @@ class PerformanceMetricsDialog(QDialog):
         # Data Sent
         sent_layout = QHBoxLayout()
         sent_label = QLabel("Data Sent:")
-        self.sent_value = QLabel("0 MB")
+        self.sent_value = QLabel("0.00 MB/s")
         sent_layout.addWidget(sent_label)
         sent_layout.addWidget(self.sent_value)
         network_layout.addLayout(sent_layout)
@@ -194,11 +247,18 @@ class PerformanceMetricsDialog(QDialog):
         # Data Received
         received_layout = QHBoxLayout()
         received_label = QLabel("Data Received:")
-        self.received_value = QLabel("0 MB")
+        self.received_value = QLabel("0.00 MB/s")
         received_layout.addWidget(received_label)
         received_layout.addWidget(self.received_value)
         network_layout.addLayout(received_layout)
         
+        # Data by website, heaviest first
+        self.domain_model = KeyedTableModel(["Website", "Requests", "Data", "Blocked"],
+                                            {2: format_megabytes}, self)
+        self.domain_table = FilterableTable(self.domain_model, sort_column=2)
+        self.domain_counters_version = None
+        network_layout.addWidget(self.domain_table)
+        
         network_group.setLayout(network_layout)
         layout.addWidget(network_group)
         
@@ -225,6 +285,42 @@ class PerformanceMetricsDialog(QDialog):
         browser_group.setLayout(browser_layout)
         layout.addWidget(browser_group)
         
+        # Profiling Group
+        profiling_group = QGroupBox("Profiling")
+        profiling_layout = QVBoxLayout()
+        
+        self.tracing_checkbox = QCheckBox("Record navigation trace")
+        self.tracing_checkbox.setChecked(tracing.is_enabled())
+        self.tracing_checkbox.toggled.connect(self.toggle_tracing)
+        profiling_layout.addWidget(self.tracing_checkbox)
+        
+        self.profiler_checkbox = QCheckBox("Sampling profiler")
+        self.profiler_checkbox.setChecked(tracing.profiler.is_running())
+        self.profiler_checkbox.toggled.connect(self.toggle_profiler)
+        profiling_layout.addWidget(self.profiler_checkbox)
+        
+        # Profile window
+        window_layout = QHBoxLayout()
+        window_label = QLabel("Profile last (seconds):")
+        self.profile_window = QSpinBox()
+        self.profile_window.setRange(1, 300)
+        self.profile_window.setValue(30)
+        window_layout.addWidget(window_label)
+        window_layout.addWidget(self.profile_window)
+        profiling_layout.addLayout(window_layout)
+        
+        export_layout = QHBoxLayout()
+        export_trace_button = QPushButton("Export Trace")
+        export_trace_button.clicked.connect(self.export_trace)
+        dump_profile_button = QPushButton("Dump Profile")
+        dump_profile_button.clicked.connect(self.dump_profile)
+        export_layout.addWidget(export_trace_button)
+        export_layout.addWidget(dump_profile_button)
+        profiling_layout.addLayout(export_layout)
+        
+        profiling_group.setLayout(profiling_layout)
+        layout.addWidget(profiling_group)
+        
         # Close Button
         close_button = QPushButton("Close")
         close_button.clicked.connect(self.close)
@@ -272,42 +368,100 @@ class PerformanceMetricsDialog(QDialog):
         # Setup update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_metrics)
-        self.update_timer.start(1000)  # Update every second
+        self.update_timer.start(2000)  # Update every two seconds
         
-        # Initialize network stats
+        # Initialize network stats, which are sampled less often
         self.last_net_io = psutil.net_io_counters()
+        self.last_net_io_at = time.monotonic()
+        self.net_io_interval = 6
         self.start_time = datetime.now()
         
         # Get the current process
         self.process = psutil.Process()
     
     def update_metrics(self):
+        # Nothing to redraw while the dialog is minimized or hidden
+        if not self.isVisible() or self.isMinimized():
+            return
         try:
-            # Update CPU and Memory for the browser process
-            cpu_percent = int(self.process.cpu_percent())
-            memory_info = self.process.memory_info()
-            memory_percent = int(self.process.memory_percent())
-            
-            self.cpu_bar.setValue(cpu_percent)
-            self.memory_bar.setValue(memory_percent)
-            self.memory_details.setText(f"Used: {memory_info.rss / (1024*1024):.2f} MB")
+            # Update CPU and Memory for the browser process, reading /proc once
+            with self.process.oneshot():
+                cpu_percent = int(self.process.cpu_percent())
+                memory_info = self.process.memory_info()
+                memory_percent = int(self.process.memory_percent())
             
-            # Update Network Stats
-            current_net_io = psutil.net_io_counters()
-            bytes_sent = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / (1024*1024)
-            bytes_recv = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / (1024*1024)
+            self.set_bar_value(self.cpu_bar, cpu_percent)
+            self.set_bar_value(self.memory_bar, memory_percent)
+            self.set_label_text(self.memory_details, f"Used: {memory_info.rss / (1024*1024):.2f} MB")
             
-            self.sent_value.setText(f"{bytes_sent:.2f} MB")
-            self.received_value.setText(f"{bytes_recv:.2f} MB")
+            # Update Network Stats every few seconds
+            now = time.monotonic()
+            elapsed = now - self.last_net_io_at
+            if elapsed >= self.net_io_interval:
+                current_net_io = psutil.net_io_counters()
+                bytes_sent = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / (1024*1024)
+                bytes_recv = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / (1024*1024)
+                
+                self.set_label_text(self.sent_value, f"{bytes_sent / elapsed:.2f} MB/s")
+                self.set_label_text(self.received_value, f"{bytes_recv / elapsed:.2f} MB/s")
+                
+                self.last_net_io = current_net_io
+                self.last_net_io_at = now
             
-            self.last_net_io = current_net_io
+            if hasattr(self.parent(), 'domain_counters'):
+                self.update_domain_table(self.parent().domain_counters)
             
             # Update Browser Stats
             if hasattr(self.parent(), 'history'):
-                self.history_count.setText(str(len(self.parent().history)))
+                self.set_label_text(self.history_count, str(len(self.parent().history)))
+            if getattr(self.parent(), 'last_load_ms', None) is not None:
+                self.set_label_text(self.load_time_value, f"{self.parent().last_load_ms:.0f} ms")
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             # Handle case where process is no longer accessible
             self.close()
+    
+    def set_bar_value(self, bar, value):
+        # Only touch widgets whose value changed, so unchanged ones aren't repainted
+        if bar.value() != value:
+            bar.setValue(value)
+    
+    def set_label_text(self, label, text):
+        if label.text() != text:
+            label.setText(text)
+    
+    def update_domain_table(self, domain_counters):
+        """Refresh the per-website table, skipping the work when no counter changed."""
+        if domain_counters.version == self.domain_counters_version:
+            return
+        self.domain_counters_version = domain_counters.version
+        self.domain_model.update(domain_counters.rows())
+    
+    def toggle_tracing(self, checked):
+        if checked:
+            tracing.enable()
+        else:
+            tracing.disable()
+    
+    def toggle_profiler(self, checked):
+        if checked:
+            tracing.profiler.start()
+        else:
+            tracing.profiler.stop()
+    
+    def export_trace(self):
+        """Save recorded spans for chrome://tracing or Perfetto."""
+        path = os.path.abspath(f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        count = tracing.export_chrome_trace(path)
+        QMessageBox.information(self, "Trace Exported", f"Saved {count} spans to {path}")
+    
+    def dump_profile(self):
+        """Save the profiler samples of the last N seconds as collapsed stacks for flamegraph tools."""
+        if not tracing.profiler.is_running():
+            QMessageBox.warning(self, "Profiler", "Turn on the sampling profiler first.")
+            return
+        path = os.path.abspath(f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+        count = tracing.profiler.dump_collapsed(path, self.profile_window.value())
+        QMessageBox.information(self, "Profile Saved", f"Saved {count} samples to {path}")
 
 class SafeBrowseJunior(QMainWindow):
     def __init__(self):
@@ -359,12 +513,50 @@ class SafeBrowseJunior(QMainWindow):
         # Initialize browsing history and screen time
         self.history = load_history()
         self.screen_time = load_screen_time()
+        self.report_builder = ReportBuilder()
+        # Convert the history for reports in the background, so the first report is quick
+        threading.Thread(target=self.report_builder.update, args=(self.history,),
+                         name="report-warmup", daemon=True).start()
         self.current_site_start_time = None
         self.current_site = None
+        self.load_started_at = None
+        self.last_load_ms = None
         
         # Initialize safe mode state
         self.safe_mode = True
         
+        # Per-child web profile with a persistent HTTP cache
+        self.profile_settings = load_profile_settings()
+        self.profile = create_profile(self.profile_settings, QApplication.instance())
+        set_active_profile(active_child(self.profile_settings))
+        self.is_loading = False
+        
+        # Record every blocked navigation for parents
+        self.audit_log = AuditLogWriter()
+        self.audit_log.start()
+        self.block_warnings = {}
+        
+        # Per-website request and data counters, saved once a minute
+        self.domain_counters = DomainCounters()
+        self.domain_counters_timer = QTimer()
+        self.domain_counters_timer.timeout.connect(self.domain_counters.flush)
+        self.domain_counters_timer.start(60000)
+        
+        self.request_interceptor = SafeUrlRequestInterceptor(self, self.audit_log,
+                                                             self.domain_counters)
+        self.profile.setUrlRequestInterceptor(self.request_interceptor)
+        
+        # Score the links on each page in the background
+        self.prefetcher = LinkPrefetcher(classify_text_content, fetch_page_text,
+                                         record_bytes=self.domain_counters.add_download)
+        
+        # Keep the blocklist in sync with the central policy server, if one is configured
+        self.policy_sync = None
+        sync_config = load_sync_config()
+        if sync_config["url"]:
+            self.policy_sync = PolicySyncClient(sync_config)
+            self.policy_sync.start()
+        
         # Create main layout
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -374,9 +566,16 @@ class SafeBrowseJunior(QMainWindow):
         
         # Create the safe web view
         self.browser = QWebEngineView()
-        safe_page = SafeWebPage(self.browser)
+        safe_page = SafeWebPage(self.profile, self.browser, window=self)
         self.browser.setPage(safe_page)
-        self.browser.setUrl(QUrl('https://www.kiddle.co'))  # Kid-safe search engine
+        self.browser.setUrl(QUrl(HOME_URL))  # Kid-safe search engine
+        
+        # Warm the cache for kid-safe sites once the browser is idle
+        preload_sites = [site for site in self.profile_settings["preload_sites"]
+                         if is_safe_url(site, self.safe_mode)]
+        self.preloader = CachePreloader(self.profile, preload_sites,
+                                        self.profile_settings["preload_delay_ms"],
+                                        is_busy=lambda: self.is_loading, parent=self)
         
         # Create child-friendly toolbar
         self.create_toolbar()
@@ -388,6 +587,7 @@ class SafeBrowseJunior(QMainWindow):
         self.setup_status_bar()
         
         # Connect signals
+        self.browser.loadStarted.connect(self.on_load_started)
         self.browser.loadFinished.connect(self.on_load_finished)
         self.browser.urlChanged.connect(self.on_url_changed)
         
@@ -480,13 +680,17 @@ class SafeBrowseJunior(QMainWindow):
             
             # Update the stored time
             self.screen_time[self.current_site] = self.screen_time.get(self.current_site, 0) + 1
-            save_screen_time(self.screen_time)
+            with tracing.span("save_screen_time"):
+                save_screen_time(self.screen_time)
 
     def show_screen_time_details(self, event):
         """Show the screen time details dialog."""
-        dialog = ScreenTimeDialog(self.screen_time, self)
+        dialog = ScreenTimeDialog(self.screen_time, self, history=self.history,
+                                  load_blocked_events=load_audit_log,
+                                  report_builder=self.report_builder)
         dialog.exec_()
 
+    @tracing.traced("navigate_to_url")
     def navigate_to_url(self):
         url = self.url_bar.text()
         
@@ -495,28 +699,73 @@ class SafeBrowseJunior(QMainWindow):
             url = 'https://' + url
             
         # Check URL safety before loading
-        if is_safe_url(url, self.safe_mode):
+        safe, rule = check_url(url, self.safe_mode)
+        if safe:
             self.browser.setUrl(QUrl(url))
         else:
-            QMessageBox.warning(self, "Safety Alert",
-                "This website might not be safe for children!")
+            if self.record_block(url, rule, SOURCE_TYPED):
+                with tracing.span("QMessageBox"):
+                    QMessageBox.warning(self, "Safety Alert",
+                        "This website might not be safe for children!")
             self.url_bar.setText('')
 
+    def record_block(self, url, rule, source):
+        """Log a blocked navigation. Returns False if the child was already warned about this host recently."""
+        self.audit_log.record(url, rule, source)
+        host = urlparse(url).hostname or url
+        self.domain_counters.add_blocked(host)
+        now = time.monotonic()
+        last_blocked = self.block_warnings.get(host)
+        # Forget hosts whose warning window has passed so this doesn't grow forever
+        self.block_warnings = {blocked_host: blocked_at
+                               for blocked_host, blocked_at in self.block_warnings.items()
+                               if now - blocked_at <= BLOCK_WARNING_WINDOW}
+        self.block_warnings[host] = now
+        return last_blocked is None or now - last_blocked > BLOCK_WARNING_WINDOW
+
     def go_home(self):
-        self.browser.setUrl(QUrl('https://www.kiddle.co'))
+        self.browser.setUrl(QUrl(HOME_URL))
+
+    @pyqtSlot()
+    def on_load_started(self):
+        self.is_loading = True
+        self.load_started_at = time.perf_counter()
 
     @pyqtSlot(bool)
     def on_load_finished(self, ok):
+        self.is_loading = False
+        if self.load_started_at is not None:
+            finished_at = time.perf_counter()
+            self.last_load_ms = (finished_at - self.load_started_at) * 1000
+            tracing.add_span("page_load", self.load_started_at, finished_at,
+                             url=self.browser.url().toString(), ok=ok)
+            self.load_started_at = None
+        if self.profile_settings["preload_enabled"]:
+            self.preloader.start()
         if ok:
             # Log browsing activity
             self.log_activity()
             
+            # Count the data this page used, per website
+            self.browser.page().runJavaScript(RESOURCE_SIZES_JS, self.record_resource_sizes)
+            
+            # Warm verdicts for the links the child may click next
+            if self.safe_mode and self.profile_settings["prefetch_enabled"]:
+                self.browser.page().runJavaScript(EXTRACT_LINKS_JS, self.prefetcher.submit)
+            
             # Update screen time tracking
             current_url = self.browser.url().toString()
             if current_url != self.current_site:
                 self.current_site = current_url
                 self.current_site_start_time = datetime.now()
 
+    def record_resource_sizes(self, entries):
+        for url, size in entries or []:
+            host = QUrl(url).host()
+            if host:
+                self.domain_counters.add_bytes(host, size)
+
+    @tracing.traced("log_activity")
     def log_activity(self):
         activity = {
             'timestamp': datetime.now().isoformat(),
@@ -563,6 +812,15 @@ class SafeBrowseJunior(QMainWindow):
             QMessageBox.information(self, "Safe Mode", 
                 "Safe mode has been enabled. Content filtering is now active.")
 
+    def closeEvent(self, event):
+        # Make sure queued audit entries reach the disk
+        self.audit_log.stop()
+        if self.policy_sync is not None:
+            self.policy_sync.stop()
+        self.prefetcher.shutdown()
+        self.domain_counters.flush()
+        super().closeEvent(event)
+
 def main():
     app = QApplication(sys.argv)
     app.setApplicationName('SafeBrowse Junior')
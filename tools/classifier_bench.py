@@ -0,0 +1,132 @@
+"""
+Parity check and latency/memory benchmark for the content classifier backends.
+
+Each backend is loaded in its own process so its memory use is measured in isolation.
+Top labels are compared with the reference backend (full precision PyTorch by default);
+the run fails if they agree on fewer than --min-agreement of the sample texts.
+
+Usage:
+    python tools/classifier_bench.py --backends pytorch quantized onnx --output classifier.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SAMPLE_TEXTS = [
+    "Volcanoes form when magma from deep inside the Earth rises to the surface. Learn how lava, ash and gas shape new land.",
+    "Practice your times tables with these fun worksheets. Multiply, divide and check your answers with a friend.",
+    "The city council voted on Tuesday to expand the public library and extend its opening hours on weekends.",
+    "Watch the new animated movie trailer and play the official game with your favourite characters.",
+    "Graphic footage shows the aftermath of the attack, with soldiers firing weapons and wounded people in the street.",
+    "Explicit content for adults only. You must be over 18 to enter this site.",
+    "Photosynthesis is the process plants use to turn sunlight, water and carbon dioxide into food and oxygen.",
+    "Breaking: a strong storm is expected to reach the coast tonight, and schools will be closed tomorrow.",
+    "Top 10 funniest cat videos of the year, plus a quiz to find out which cartoon pet you are.",
+    "The knight drew his sword and the battle raged for hours until the castle walls fell.",
+    "Ancient Egyptians built the pyramids as tombs for their pharaohs, using huge blocks of limestone.",
+    "Sign up for live music concerts, comedy shows and the summer film festival in the park."
+]
+
+def run_worker(backend, runs):
+    """Load one backend, classify the samples and print the measurements as JSON."""
+    from utils.ai_utils import CANDIDATE_LABELS
+    from utils.inference_backends import load_classifier_config, create_backend
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    config = {**load_classifier_config(), "backend": backend}
+
+    started = time.perf_counter()
+    classifier = create_backend(config)
+    load_seconds = time.perf_counter() - started
+
+    # Warm up so one-time allocations don't count towards latency
+    classifier(SAMPLE_TEXTS[0], CANDIDATE_LABELS)
+
+    latencies = []
+    results = []
+    for text in SAMPLE_TEXTS:
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = classifier(text, CANDIDATE_LABELS)
+            timings.append((time.perf_counter() - started) * 1000)
+        latencies.append(statistics.median(timings))
+        results.append(dict(zip(result["labels"], result["scores"])))
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": round(load_seconds, 2),
+        "rss_mb": round((process.memory_info().rss - rss_before) / (1024 * 1024), 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies), 1),
+            "max": round(max(latencies), 1)
+        },
+        "scores": results
+    }))
+
+def measure(backend, runs):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', backend,
+                             '--runs', str(runs)],
+                            check=True, capture_output=True, text=True, cwd=REPO_ROOT).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(reference, candidate):
+    """Return the share of samples with the same top label and the largest score difference."""
+    agree = 0
+    max_diff = 0.0
+    for expected, actual in zip(reference["scores"], candidate["scores"]):
+        if max(expected, key=expected.get) == max(actual, key=actual.get):
+            agree += 1
+        max_diff = max(max_diff, max(abs(expected[label] - actual[label]) for label in expected))
+    return agree / len(reference["scores"]), max_diff
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare content classifier backends.")
+    parser.add_argument('--backends', nargs='+', default=['pytorch', 'quantized', 'onnx'])
+    parser.add_argument('--reference', default='pytorch', help="Backend the others must agree with")
+    parser.add_argument('--runs', type=int, default=5, help="Timed runs per sample text")
+    parser.add_argument('--min-agreement', type=float, default=0.9,
+                        help="Fail if fewer than this share of top labels match the reference")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.runs)
+        return
+
+    backends = [args.reference] + [backend for backend in args.backends if backend != args.reference]
+    results = {backend: measure(backend, args.runs) for backend in backends}
+    reference = results[args.reference]
+
+    failed = False
+    print(f"{'backend':12} {'p50 ms':>8} {'speedup':>8} {'RSS MB':>8} {'RSS ratio':>10} {'agreement':>10} {'max diff':>9}")
+    for backend, result in results.items():
+        agreement, max_diff = compare(reference, result)
+        result["agreement"] = agreement
+        result["max_score_diff"] = round(max_diff, 4)
+        speedup = reference["latency_ms"]["p50"] / result["latency_ms"]["p50"]
+        rss_ratio = result["rss_mb"] / reference["rss_mb"] if reference["rss_mb"] else float('nan')
+        print(f"{backend:12} {result['latency_ms']['p50']:>8.1f} {speedup:>7.2f}x {result['rss_mb']:>8.1f} "
+              f"{rss_ratio:>10.2f} {agreement:>10.0%} {max_diff:>9.4f}")
+        if agreement < args.min_agreement:
+            failed = True
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Synthetic data generators for benchmarks, scaled by blocklist size, history length and key count."""
+import random
+from datetime import datetime, timedelta
+
+WORDS = ["kids", "learn", "games", "math", "science", "story", "music", "art",
+         "animals", "space", "video", "news", "shop", "chat", "fun", "play"]
+TLDS = ["com", "org", "net", "co", "in", "edu"]
+
+def make_domains(count, seed=0):
+    """Return `count` distinct, realistic-looking domain names."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)}{rng.choice(WORDS)}{i}.{rng.choice(TLDS)}" for i in range(count)]
+
+def make_parental_controls(blocked_count, allowed_count=10, seed=0):
+    """Return a parental_controls.json style settings dict."""
+    domains = make_domains(blocked_count + allowed_count, seed)
+    return {
+        "blocked_websites": domains[:blocked_count],
+        "allowed_websites": domains[blocked_count:]
+    }
+
+def make_urls(count, domain_count=500, seed=0):
+    """Return `count` page URLs spread over `domain_count` domains."""
+    rng = random.Random(seed)
+    domains = make_domains(domain_count, seed + 1)
+    urls = []
+    for i in range(count):
+        prefix = "https://www." if rng.random() < 0.5 else "https://"
+        urls.append(f"{prefix}{rng.choice(domains)}/{rng.choice(WORDS)}/{i}")
+    return urls
+
+def make_history(count, domain_count=500, days=365, seed=0):
+    """Return a browsing_history.json style list, oldest entry first."""
+    rng = random.Random(seed)
+    urls = make_urls(count, domain_count, seed)
+    start = datetime(2024, 1, 1)
+    offsets = sorted(rng.randrange(days * 86400) for _ in range(count))
+    return [
+        {
+            'timestamp': (start + timedelta(seconds=offset, microseconds=rng.randrange(1000000))).isoformat(),
+            'url': url,
+            'title': f"Page {i}"
+        }
+        for i, (offset, url) in enumerate(zip(offsets, urls))
+    ]
+
+def make_screen_time(key_count, seed=0):
+    """Return a screen_time.json style dict of URL -> seconds."""
+    rng = random.Random(seed)
+    return {url: rng.randrange(1, 7200) for url in make_urls(key_count, max(1, key_count // 4), seed)}
+
+def make_text(length, seed=0):
+    """Return page-like text of roughly `length` characters."""
+    rng = random.Random(seed)
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
@@ -0,0 +1,371 @@
+"""
+Replayable navigation load test for SafeBrowse Junior.
+
+Runs the real browser window offscreen, replays a recorded navigation trace
+(for example browsing_history.json) through the URL bar at a fixed rate and
+serves every page from a local stand-in HTTP server, so results don't depend
+on the network. With --click-every N, every Nth navigation clicks a link on
+the current page instead, which leads to another site from the trace.
+Reports navigation decision latency (typed addresses and clicked links),
+subresource check latency, page load latency, disk writes per minute from
+history and screen time persistence, and RSS growth over the session.
+
+Usage:
+    python tools/load_test.py --trace browsing_history.json --rate 2 --duration 600
+    python tools/load_test.py --trace browsing_history.json --rate 2 --click-every 2
+"""
+import argparse
+import html
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+import psutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Must be set before Qt is imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QTWEBENGINE_DISABLE_SANDBOX', '1')
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtNetwork import QNetworkProxy
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves a small synthetic page for any URL requested through the proxy."""
+
+    page_size = 20000
+    # Every page links to one of these, picked by the page's URL
+    link_targets = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        host = parsed.netloc or self.headers.get('Host', 'localhost')
+        filler = ('<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>\n'
+                  * (self.page_size // 60))
+        link = f"http://{host}/next"
+        if self.link_targets:
+            link = self.link_targets[zlib.crc32(self.path.encode('utf-8')) % len(self.link_targets)]
+        body = (f"<html><head><title>{host}{parsed.path}</title></head><body>"
+                f"<h1>{host}</h1>"
+                f"<a id='trace-link' href='{html.escape(link)}'>elsewhere</a> "
+                f"<a href='http://{host}/next'>next</a>"
+                f"{filler}</body></html>").encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'max-age=3600')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_CONNECT(self):
+        # TLS is not emulated; trace URLs are rewritten to plain http instead
+        self.send_error(501)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in_server(page_size, link_targets=()):
+    StandInHandler.page_size = page_size
+    StandInHandler.link_targets = list(link_targets)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def load_trace(path):
+    """Load the URLs to replay from a history file (a list of entries with a 'url' key)."""
+    with open(path, 'r') as f:
+        entries = json.load(f)
+    urls = [entry['url'] if isinstance(entry, dict) else entry for entry in entries]
+    # The stand-in server only speaks plain http
+    return [('http://' + url[len('https://'):]) if url.startswith('https://') else url
+            for url in urls if url.startswith(('http://', 'https://'))]
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+# Clicks the page's link to another trace site; returns the link or null if there is none
+CLICK_LINK_JS = """
+(function() {
+    var link = document.getElementById('trace-link') || document.links[0];
+    if (!link) return null;
+    link.click();
+    return link.href;
+})()
+"""
+
+class LoadTest:
+    def __init__(self, browser_module, urls, rate, duration, click_every=0):
+        self.browser_module = browser_module
+        self.urls = urls
+        self.rate = rate
+        self.duration = duration
+        self.click_every = click_every
+        self.clicks = 0
+        self.process = psutil.Process()
+
+        self.decision_ms = []
+        self.subresource_ms = []
+        self.in_interceptor = False
+        self.load_ms = []
+        self.aborted = 0
+        self.failed = 0
+        self.writes = {}
+        self.rss_samples = []
+        self.pending_start = None
+        # Navigations are numbered so a page load can be matched to the navigation that
+        # started it; a load interrupted by a newer navigation still emits loadFinished(False)
+        self.navigation_id = 0
+        self.pending_navigation = None
+        self.loading_navigation = None
+        self.position = 0
+        self.elapsed = None
+
+        self.instrument()
+
+        self.window = browser_module.SafeBrowseJunior()
+        self.window.show()
+        self.window.browser.loadStarted.connect(self.on_load_started)
+        self.window.browser.loadFinished.connect(self.on_load_finished)
+
+        self.rss_timer = QTimer()
+        self.rss_timer.timeout.connect(self.sample_rss)
+        self.nav_timer = QTimer()
+        self.nav_timer.timeout.connect(self.navigate_next)
+
+    def instrument(self):
+        """Wrap the browser's hot path functions to record timings and writes."""
+        module = self.browser_module
+
+        # check_url decides typed and clicked navigations, and the request interceptor
+        # also calls it for every subresource; time the two separately
+        original_check_url = module.check_url
+        def timed_check_url(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_check_url(*args, **kwargs)
+            finally:
+                samples = self.subresource_ms if self.in_interceptor else self.decision_ms
+                samples.append((time.perf_counter() - start) * 1000)
+        module.check_url = timed_check_url
+
+        interceptor_class = module.SafeUrlRequestInterceptor
+        original_intercept = interceptor_class.interceptRequest
+        def intercept_request(interceptor, info):
+            self.in_interceptor = True
+            try:
+                original_intercept(interceptor, info)
+            finally:
+                self.in_interceptor = False
+        interceptor_class.interceptRequest = intercept_request
+
+        # Clicked links refused by the page never start a load
+        page_class = module.SafeWebPage
+        original_accept = page_class.acceptNavigationRequest
+        def accept_navigation(page, url, _type, isMainFrame):
+            if _type == QWebEnginePage.NavigationTypeLinkClicked:
+                # A blocked link opens its warning from in here
+                QTimer.singleShot(0, self.dismiss_dialogs)
+            accepted = original_accept(page, url, _type, isMainFrame)
+            if not accepted and _type == QWebEnginePage.NavigationTypeLinkClicked:
+                self.navigation_refused()
+            return accepted
+        page_class.acceptNavigationRequest = accept_navigation
+
+        for name, filename in (('save_history', 'browsing_history.json'),
+                               ('save_screen_time', 'screen_time.json')):
+            self.writes[name] = {"calls": 0, "bytes": 0}
+            module_function = getattr(module, name)
+            def counted(data, _function=module_function, _name=name, _filename=filename):
+                _function(data)
+                self.writes[_name]["calls"] += 1
+                self.writes[_name]["bytes"] += os.path.getsize(_filename)
+            setattr(module, name, counted)
+
+    def sample_rss(self):
+        self.rss_samples.append(self.process.memory_info().rss)
+
+    def dismiss_dialogs(self):
+        dialog = QApplication.activeModalWidget()
+        if dialog is not None:
+            dialog.close()
+
+    def navigate_next(self):
+        if time.monotonic() - self.started_at >= self.duration:
+            self.finish()
+            return
+
+        if self.pending_navigation is not None:
+            self.aborted += 1
+
+        # Blocked sites open a modal warning; close it as soon as it appears
+        QTimer.singleShot(0, self.dismiss_dialogs)
+        self.navigation_id += 1
+        self.pending_navigation = self.navigation_id
+        self.pending_start = time.perf_counter()
+
+        if self.click_every and self.navigation_id % self.click_every == 0:
+            self.clicks += 1
+            self.window.browser.page().runJavaScript(
+                CLICK_LINK_JS,
+                lambda link, navigation=self.navigation_id: self.on_link_clicked(link, navigation))
+            return
+
+        url = self.urls[self.position % len(self.urls)]
+        self.position += 1
+        self.window.url_bar.setText(url)
+        self.window.navigate_to_url()
+        if self.window.url_bar.text() == '':
+            self.navigation_refused()
+
+    def on_link_clicked(self, link, navigation):
+        if link is None and self.pending_navigation == navigation:
+            # Nothing to click on this page
+            self.navigation_refused()
+
+    def navigation_refused(self):
+        # No page load will follow
+        self.pending_navigation = None
+        self.pending_start = None
+        if self.rate <= 0:
+            QTimer.singleShot(0, self.navigate_next)
+
+    def on_load_started(self):
+        # Qt finishes any interrupted load before starting the next one,
+        # so the load starting now belongs to the latest navigation
+        self.loading_navigation = self.pending_navigation
+
+    def on_load_finished(self, ok):
+        navigation = self.loading_navigation
+        self.loading_navigation = None
+        if navigation is None or navigation != self.pending_navigation:
+            # The home page, or a load that was already counted as aborted
+            return
+        if ok:
+            self.load_ms.append((time.perf_counter() - self.pending_start) * 1000)
+        else:
+            self.failed += 1
+        self.pending_navigation = None
+        self.pending_start = None
+        if self.rate <= 0:
+            QTimer.singleShot(0, self.navigate_next)
+
+    def run(self):
+        self.started_at = time.monotonic()
+        self.sample_rss()
+        self.rss_timer.start(5000)
+        if self.rate > 0:
+            self.nav_timer.start(int(1000 / self.rate))
+        # Don't hang forever if a page never finishes loading
+        QTimer.singleShot(int((self.duration + 30) * 1000), self.finish)
+        self.navigate_next()
+        QApplication.instance().exec_()
+
+    def finish(self):
+        if self.elapsed is not None:
+            return
+        self.nav_timer.stop()
+        self.rss_timer.stop()
+        self.sample_rss()
+        self.elapsed = time.monotonic() - self.started_at
+        QApplication.instance().quit()
+
+    def report(self):
+        minutes = max(self.elapsed / 60, 1e-9)
+        return {
+            "duration_s": round(self.elapsed, 1),
+            "navigations": self.navigation_id,
+            "link_clicks": self.clicks,
+            "aborted_loads": self.aborted,
+            "failed_loads": self.failed,
+            "navigation_decision": percentiles(self.decision_ms),
+            "subresource_check": percentiles(self.subresource_ms),
+            "page_load": percentiles(self.load_ms),
+            "disk_writes_per_minute": {
+                name: {
+                    "calls": round(stats["calls"] / minutes, 1),
+                    "kb": round(stats["bytes"] / 1024 / minutes, 1)
+                }
+                for name, stats in self.writes.items()
+            },
+            "rss_mb": {
+                "start": round(self.rss_samples[0] / (1024 * 1024), 1),
+                "end": round(self.rss_samples[-1] / (1024 * 1024), 1),
+                "peak": round(max(self.rss_samples) / (1024 * 1024), 1),
+                "growth": round((self.rss_samples[-1] - self.rss_samples[0]) / (1024 * 1024), 1)
+            }
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a navigation trace against SafeBrowse Junior.")
+    parser.add_argument('--trace', required=True, help="History file to replay (browsing_history.json format)")
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help="Navigations per second (0 = next one as soon as a page finishes loading)")
+    parser.add_argument('--duration', type=float, default=60, help="Session length in seconds")
+    parser.add_argument('--settings', help="parental_controls.json to use for the session")
+    parser.add_argument('--page-size', type=int, default=20000, help="Size of stand-in pages in bytes")
+    parser.add_argument('--click-every', type=int, default=0,
+                        help="Click a link on the current page instead of typing every Nth navigation (0 = never)")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    urls = load_trace(args.trace)
+    if not urls:
+        parser.error("trace contains no http(s) URLs")
+    output = os.path.abspath(args.output) if args.output else None
+
+    # Run in a scratch directory so the session's JSON files don't touch real data
+    workdir = tempfile.mkdtemp(prefix='browsebuddy-load-')
+    if args.settings:
+        shutil.copy(args.settings, os.path.join(workdir, 'parental_controls.json'))
+    with open(os.path.join(workdir, 'browser_profile.json'), 'w') as f:
+        # Prefetching would bypass the stand-in server and load the classifier
+        json.dump({"preload_enabled": False, "prefetch_enabled": False,
+                   "cache_dir": os.path.join(workdir, 'cache')}, f)
+    os.chdir(workdir)
+
+    server = start_stand_in_server(args.page_size, urls)
+
+    # Imported late: loading the settings modules creates files in the working directory
+    import browser
+
+    app = QApplication(sys.argv)
+    # Route every page load through the stand-in server
+    QNetworkProxy.setApplicationProxy(QNetworkProxy(QNetworkProxy.HttpProxy, '127.0.0.1',
+                                                    server.server_address[1]))
+
+    test = LoadTest(browser, urls, args.rate, args.duration, args.click_every)
+    test.run()
+    server.shutdown()
+
+    report = test.report()
+    print(json.dumps(report, indent=2))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
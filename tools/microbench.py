@@ -0,0 +1,180 @@
+"""
+Micro-benchmarks for the filtering and persistence hot paths.
+
+Each benchmark is run at several data sizes so the scaling curve is visible.
+Results are written as JSON; pass a previous results file with --baseline to
+compare per-call cost and fail on regressions.
+
+Usage:
+    python tools/microbench.py --output bench.json
+    python tools/microbench.py --baseline bench.json --threshold 1.2
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datagen
+
+BLOCKLIST_SIZES = [10, 100, 1000, 10000]
+HISTORY_SIZES = [100, 1000, 10000]
+SCREEN_TIME_SIZES = [10, 100, 1000, 10000]
+TEXT_SIZES = [200, 1000, 10000]
+VERDICT_INDEX_SIZES = [100, 1000, 5000]
+
+class StubClassifier:
+    """Stands in for the zero-shot pipeline so only our own code is measured."""
+
+    def __call__(self, text, candidate_labels):
+        return {"labels": list(candidate_labels), "scores": [1.0 / len(candidate_labels)] * len(candidate_labels)}
+
+def write_json(filename, data):
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def measure(function, repeat):
+    """Return per-call timings in microseconds for `repeat` timing runs."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+
+def collect_benchmarks():
+    """Yield (name, setup, function) for every benchmark and data size."""
+    from utils.content_filter import is_safe_url
+    from utils.parental_controls import load_parental_controls, normalize_domain
+    from utils.history_manager import load_history, save_history
+    from utils.screen_time_manager import save_screen_time
+    from utils.verdict_index import VerdictIndex
+    try:
+        from utils import ai_utils
+    except ImportError:
+        # The classifier needs requests and beautifulsoup4, which are optional
+        print("Skipping classify_text_content: classifier dependencies are not installed")
+        ai_utils = None
+
+    for size in BLOCKLIST_SIZES:
+        settings = datagen.make_parental_controls(size)
+        setup = lambda settings=settings: write_json('parental_controls.json', settings)
+        yield (f"is_safe_url[blocked={size}]", setup,
+               lambda: is_safe_url("https://www.example.com/page"))
+        yield (f"is_safe_url_subdomain_hit[blocked={size}]", setup,
+               lambda settings=settings: is_safe_url("https://videos." + settings["blocked_websites"][-1]))
+        yield (f"load_parental_controls[blocked={size}]", setup, load_parental_controls)
+
+    for url in ("youtube.com", "https://www.YouTube.com/", "http://kids.example.org/path"):
+        yield (f"normalize_domain[{url}]", None, lambda url=url: normalize_domain(url))
+
+    for size in HISTORY_SIZES:
+        history = datagen.make_history(size)
+        yield (f"save_history[entries={size}]", None, lambda history=history: save_history(history))
+        yield (f"load_history[entries={size}]",
+               lambda history=history: write_json('browsing_history.json', history), load_history)
+
+    for size in SCREEN_TIME_SIZES:
+        screen_time = datagen.make_screen_time(size)
+        yield (f"save_screen_time[keys={size}]", None,
+               lambda screen_time=screen_time: save_screen_time(screen_time))
+
+    if ai_utils is not None:
+        ai_utils.classifier = StubClassifier()
+        for size in TEXT_SIZES:
+            text = datagen.make_text(size)
+            # Start every call from an empty verdict index so the model path is measured,
+            # not a near-duplicate hit; lookups are timed by verdict_index_lookup below
+            def classify_uncached(text=text):
+                ai_utils.verdict_index.clear()
+                return ai_utils.classify_text_content(text)
+            yield (f"classify_text_content[chars={size}]", None, classify_uncached)
+
+    for size in VERDICT_INDEX_SIZES:
+        index = VerdictIndex(capacity=size)
+        for seed in range(size):
+            index.add(index.sketch(datagen.make_text(1000, seed)), "educational")
+        text = datagen.make_text(1000, seed=size + 1)
+        yield (f"verdict_index_lookup[entries={size}]", None,
+               lambda index=index, text=text: index.lookup(index.sketch(text)))
+
+def run(name_filter, repeat):
+    results = {}
+    for name, setup, function in collect_benchmarks():
+        if name_filter and name_filter not in name:
+            continue
+        if setup:
+            setup()
+        timings = measure(function, repeat)
+        results[name] = {
+            "per_call_us": round(statistics.median(timings), 3),
+            "min_us": round(min(timings), 3),
+            "max_us": round(max(timings), 3)
+        }
+        print(f"{name:55} {results[name]['per_call_us']:>14.3f} us")
+    return results
+
+def compare(results, baseline, threshold):
+    """Print the ratio to the baseline for each benchmark and return the names that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':55} {'baseline us':>14} {'current us':>14} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["per_call_us"]
+        ratio = result["per_call_us"] / before if before else float('inf')
+        marker = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:55} {before:>14.3f} {result['per_call_us']:>14.3f} {ratio:>7.2f}{marker}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for SafeBrowse Junior hot paths.")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--baseline', help="Results file from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Fail if a benchmark is this many times slower than the baseline")
+    parser.add_argument('--filter', help="Only run benchmarks whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs per benchmark")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)["results"]
+
+    # The modules read and write their JSON files in the working directory
+    workdir = tempfile.mkdtemp(prefix='browsebuddy-bench-')
+    os.chdir(workdir)
+    try:
+        results = run(args.filter, args.repeat)
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None and compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
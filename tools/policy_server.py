@@ -0,0 +1,107 @@
+"""
+Stand-in policy server for testing policy sync locally.
+
+Serves the policy in a JSON file ({"blocked_websites": [...], "allowed_websites": [...]}).
+Every time the file changes a new version is recorded, so clients that send
+?since=<version> get a delta instead of the full policy, and clients that are
+up to date get 304 Not Modified.
+
+Usage:
+    python tools/policy_server.py policy.json --port 8765
+Then set "url": "http://127.0.0.1:8765/policy" in policy_sync.json.
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+POLICY_KEYS = ("blocked_websites", "allowed_websites")
+
+class PolicyStore:
+    """Keeps every version of the policy file seen so far."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.versions = []
+        self.mtime = None
+        self.last_modified = None
+
+    def current(self):
+        """Reload the file if it changed and return (version, policy)."""
+        with self.lock:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self.mtime:
+                with open(self.path, 'r') as f:
+                    policy = json.load(f)
+                policy = {key: list(policy.get(key, [])) for key in POLICY_KEYS}
+                if not self.versions or self.versions[-1] != policy:
+                    self.versions.append(policy)
+                    self.last_modified = formatdate(mtime, usegmt=True)
+                self.mtime = mtime
+            return len(self.versions), self.versions[-1]
+
+    def delta(self, since, version):
+        """Return the changes from version `since` to `version`, or None if `since` is unknown."""
+        if not 1 <= since <= len(self.versions):
+            return None
+        old, new = self.versions[since - 1], self.versions[version - 1]
+        update = {"version": version, "base_version": since}
+        for key in POLICY_KEYS:
+            old_sites, new_sites = set(old[key]), set(new[key])
+            update[key] = {
+                "add": [site for site in new[key] if site not in old_sites],
+                "remove": [site for site in old[key] if site not in new_sites]
+            }
+        return update
+
+class PolicyHandler(BaseHTTPRequestHandler):
+    store = None
+
+    def do_GET(self):
+        version, policy = self.store.current()
+        etag = f'"{version}"'
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match == etag or (if_none_match is None and
+                                     self.headers.get('If-Modified-Since') == self.store.last_modified):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        since = parse_qs(urlparse(self.path).query).get('since', [None])[0]
+        update = None
+        if since is not None and since.isdigit():
+            update = self.store.delta(int(since), version)
+        if update is None:
+            update = {"version": version, **policy}
+
+        body = json.dumps(update).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', self.store.last_modified)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a policy file to policy sync clients.")
+    parser.add_argument('policy', help="JSON file with blocked_websites and allowed_websites")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    PolicyHandler.store = PolicyStore(args.policy)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), PolicyHandler)
+    print(f"Serving {args.policy} on http://127.0.0.1:{args.port}/policy")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,48 @@
 import requests
 from bs4 import BeautifulSoup
-from transformers import pipeline
+from utils.verdict_index import VerdictIndex
+from utils.inference_backends import load_classifier_config, create_backend
 
-# Load the zero-shot classification pipeline
-classifier = pipeline("zero-shot-classification",
-                      model="facebook/bart-large-mnli")
+# Categories the classifier chooses between
+CANDIDATE_LABELS = ["educational", "entertainment", "adult", "violent", "news"]
 
-def fetch_page_text(url):
-    """Extracts visible text from a page (basic)."""
-    response = requests.get(url, timeout=3)
-    soup = BeautifulSoup(response.text, "html.parser")
+# Zero-shot classifier for the configured backend, loaded on first use
+classifier = None
+
+# Verdicts of pages classified so far, reused for near-duplicate pages
+verdict_index = VerdictIndex()
+
+def get_classifier():
+    """Load the zero-shot classifier the first time it is needed."""
+    global classifier
+    if classifier is None:
+        classifier = create_backend(load_classifier_config())
+    return classifier
+
+def fetch_page_text(url, max_bytes=None, on_download=None):
+    """
+    Extracts visible text from a page (basic). Reads at most max_bytes of the response if given.
+    on_download, if given, is called with the number of bytes read.
+    """
+    with requests.get(url, timeout=3, stream=True) as response:
+        if max_bytes is None:
+            html = response.content
+        else:
+            html = response.raw.read(max_bytes, decode_content=True)
+    if on_download is not None:
+        on_download(len(html))
+    soup = BeautifulSoup(html, "html.parser")
     return soup.get_text(separator=' ', strip=True)
 
 def classify_text_content(text):
     """Classifies text into safe/unsafe categories."""
-    candidate_labels = ["educational", "entertainment", "adult", "violent", "news"]
-    result = classifier(text[:1000], candidate_labels)  # Limit to 1000 chars
-    top_label = result["labels"][0]
+    text = text[:1000]  # Limit to 1000 chars
+    
+    # Skip the model if a near-identical page has been classified before
+    sketch = verdict_index.sketch(text)
+    top_label = verdict_index.lookup(sketch)
+    if top_label is None:
+        result = get_classifier()(text, CANDIDATE_LABELS)
+        top_label = result["labels"][0]
+        verdict_index.add(sketch, top_label)
     return top_label
@@ -0,0 +1,266 @@
+import csv
+import html
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+import numpy as np
+from utils.parental_controls import normalize_domain
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+# First-seen time of domains that have never been visited
+NEVER = np.iinfo(np.int64).max
+
+# Columnar view of a list of entries: one domain ID and one epoch-second timestamp per entry
+EventColumns = namedtuple('EventColumns', ['domain_ids', 'timestamps', 'counts'])
+
+class DomainTable:
+    """Interns domain names to small integer IDs shared by all columns of a report."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, domain):
+        domain_id = self.ids.get(domain)
+        if domain_id is None:
+            domain_id = len(self.names)
+            self.ids[domain] = domain_id
+            self.names.append(domain)
+        return domain_id
+
+    def ids_for_urls(self, urls):
+        """Map URLs to domain IDs, normalizing each distinct host only once."""
+        # Cheap host split per URL; the full normalization only runs once per distinct host
+        hosts = [(url.partition('://')[2] or url).partition('/')[0] for url in urls]
+        host_ids = {host: host_id for host_id, host in enumerate(dict.fromkeys(hosts))}
+        local_ids = np.fromiter(map(host_ids.__getitem__, hosts), dtype=np.int32, count=len(hosts))
+        host_to_domain = np.fromiter((self.intern(normalize_domain(host)) for host in host_ids),
+                                     dtype=np.int32, count=len(host_ids))
+        return host_to_domain[local_ids]
+
+def to_epoch_seconds(timestamps):
+    """
+    Convert ISO-8601 timestamps (as written by log_activity) to int64 seconds, keeping local wall time.
+    Returns (seconds, valid), where valid is False for entries that don't start with a
+    'YYYY-MM-DDTHH:MM:SS' date and time, e.g. date-only or damaged timestamps.
+    """
+    # Read the digits of 'YYYY-MM-DDTHH:MM:SS' straight out of a fixed-width byte array.
+    # Shorter strings are padded with zero bytes, which fail the digit check below.
+    try:
+        raw = np.array(timestamps, dtype='S19')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        raw = np.array([timestamp if isinstance(timestamp, str) and timestamp.isascii() else ''
+                        for timestamp in timestamps], dtype='S19')
+    chars = raw.view(np.uint8).reshape(-1, 19)
+
+    digits = chars[:, [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]]
+    valid = ((digits >= ord('0')) & (digits <= ord('9'))).all(axis=1)
+    valid &= (chars[:, 4] == ord('-')) & (chars[:, 7] == ord('-')) & (chars[:, 13] == ord(':')) \
+        & (chars[:, 16] == ord(':')) & ((chars[:, 10] == ord('T')) | (chars[:, 10] == ord(' ')))
+
+    def field(first, width):
+        value = chars[:, first].astype(np.int64) - ord('0')
+        for column in range(first + 1, first + width):
+            value = value * 10 + (chars[:, column].astype(np.int64) - ord('0'))
+        return value
+    year, month, day = field(0, 4), field(5, 2), field(8, 2)
+    hour, minute, second = field(11, 2), field(14, 2), field(17, 2)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31) \
+        & (hour < 24) & (minute < 60) & (second < 60)
+
+    # Days since 1970-01-01 in the proleptic Gregorian calendar (years start in March)
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    seconds[~valid] = 0
+    return seconds, valid
+
+def load_event_columns(entries, domains, with_counts=False):
+    """
+    Load entries with 'timestamp' and 'url' keys (and an optional 'count') into columns.
+    Entries whose timestamp can't be read are left out.
+    """
+    domain_ids = domains.ids_for_urls([entry['url'] for entry in entries])
+    timestamps, valid = to_epoch_seconds([entry['timestamp'] for entry in entries])
+    if with_counts:
+        counts = np.fromiter((entry.get('count', 1) for entry in entries), dtype=np.int64, count=len(entries))
+    else:
+        counts = np.ones(len(entries), dtype=np.int64)
+    if not valid.all():
+        domain_ids, timestamps, counts = domain_ids[valid], timestamps[valid], counts[valid]
+    return EventColumns(domain_ids, timestamps, counts)
+
+def _to_datetime(seconds):
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+def _top(values, names, top_n):
+    order = np.argsort(values, kind='stable')[::-1][:top_n]
+    return [(names[i], values[i].item()) for i in order if values[i] > 0]
+
+class ReportBuilder:
+    """
+    Builds activity reports, keeping the history columns and each domain's first visit between
+    reports. History is only ever appended to, so each report converts just the entries added
+    since the last one. Reports can be built on a background thread while the UI thread keeps
+    appending to the history.
+    """
+
+    def __init__(self):
+        self.domains = DomainTable()
+        self.history = None
+        self.history_length = 0
+        self.visits = load_event_columns([], self.domains)
+        self.first_seen = np.empty(0, dtype=np.int64)
+        self.lock = threading.Lock()
+
+    def update(self, history):
+        """Convert history entries added since the last report, e.g. ahead of the first one."""
+        with self.lock:
+            self.history_columns(history)
+
+    def history_columns(self, history):
+        if history is not self.history or len(history) < self.history_length:
+            self.history = history
+            self.history_length = 0
+            self.visits = load_event_columns([], self.domains)
+            self.first_seen = np.empty(0, dtype=np.int64)
+        # Take the new entries in one slice, as the history may grow while we work
+        entries = history[self.history_length:]
+        if entries:
+            added = load_event_columns(entries, self.domains)
+            self.visits = EventColumns(*(np.concatenate(pair) for pair in zip(self.visits, added)))
+            self.history_length += len(entries)
+            np.minimum.at(self.first_seen_columns(), added.domain_ids, added.timestamps)
+        return self.visits
+
+    def first_seen_columns(self):
+        """Return the first visit time per domain ID, growing it for newly interned domains."""
+        missing = len(self.domains.names) - len(self.first_seen)
+        if missing > 0:
+            self.first_seen = np.concatenate([self.first_seen, np.full(missing, NEVER, dtype=np.int64)])
+        return self.first_seen
+
+    def build(self, history, screen_time, blocked_events=None, days=7, now=None, top_n=10):
+        """
+        Build the activity report for the `days` days before `now`.
+        Returns top domains, a weekday x hour heatmap of visits, newly discovered domains,
+        blocked attempts and screen time per domain.
+        """
+        with self.lock:
+            return self._build(history, screen_time, blocked_events, days, now, top_n)
+
+    def _build(self, history, screen_time, blocked_events, days, now, top_n):
+        now = now or datetime.now()
+        end = np.datetime64(now.replace(microsecond=0), 's').astype(np.int64)
+        start = end - days * 86400
+
+        domains = self.domains
+        visits = self.history_columns(history)
+        blocked = load_event_columns(blocked_events or [], domains, with_counts=True)
+        screen_ids = domains.ids_for_urls(list(screen_time.keys()))
+        seconds = np.fromiter(screen_time.values(), dtype=np.int64, count=len(screen_time))
+        domain_count = len(domains.names)
+
+        in_period = (visits.timestamps >= start) & (visits.timestamps < end)
+        period_ids = visits.domain_ids[in_period]
+        period_times = visits.timestamps[in_period]
+        visit_counts = np.bincount(period_ids, minlength=domain_count)
+
+        # 1970-01-01 was a Thursday (weekday 3)
+        hours = (period_times // 3600) % 24
+        weekdays = (period_times // 86400 + 3) % 7
+        heatmap = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+
+        # A domain is new if its first visit ever falls inside the period
+        first_seen = self.first_seen_columns()
+        new_ids = np.flatnonzero((first_seen >= start) & (first_seen < end))
+        new_domains = sorted(
+            ((domains.names[domain_id], _to_datetime(seen))
+             for domain_id, seen in zip(new_ids.tolist(), first_seen[new_ids].tolist())),
+            key=lambda item: item[1])
+
+        blocked_in_period = (blocked.timestamps >= start) & (blocked.timestamps < end)
+        blocked_counts = np.bincount(blocked.domain_ids[blocked_in_period],
+                                     weights=blocked.counts[blocked_in_period],
+                                     minlength=domain_count).astype(np.int64)
+
+        screen_seconds = np.bincount(screen_ids, weights=seconds, minlength=domain_count).astype(np.int64)
+
+        return {
+            "start": _to_datetime(int(start)),
+            "end": _to_datetime(int(end)),
+            "total_visits": int(in_period.sum()),
+            "top_domains": _top(visit_counts, domains.names, top_n),
+            "heatmap": heatmap,
+            "new_domains": new_domains,
+            "blocked_attempts": int(blocked_counts.sum()),
+            "top_blocked": _top(blocked_counts, domains.names, top_n),
+            "screen_time": _top(screen_seconds, domains.names, top_n)
+        }
+
+def build_report(history, screen_time, blocked_events=None, days=7, now=None, top_n=10):
+    """Build a one-off activity report. See ReportBuilder.build."""
+    return ReportBuilder().build(history, screen_time, blocked_events, days, now, top_n)
+
+def export_csv(report, path):
+    """Write the report as CSV rows of (section, key, value)."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["section", "key", "value"])
+        writer.writerow(["period", "start", report["start"].isoformat()])
+        writer.writerow(["period", "end", report["end"].isoformat()])
+        writer.writerow(["summary", "total_visits", report["total_visits"]])
+        writer.writerow(["summary", "blocked_attempts", report["blocked_attempts"]])
+        for domain, count in report["top_domains"]:
+            writer.writerow(["top_domains", domain, count])
+        for domain, first_seen in report["new_domains"]:
+            writer.writerow(["new_domains", domain, first_seen.isoformat()])
+        for domain, count in report["top_blocked"]:
+            writer.writerow(["top_blocked", domain, count])
+        for domain, seconds in report["screen_time"]:
+            writer.writerow(["screen_time_seconds", domain, seconds])
+        for day, row in zip(WEEKDAYS, report["heatmap"].tolist()):
+            for hour, count in enumerate(row):
+                writer.writerow(["heatmap", f"{day} {hour:02d}:00", count])
+
+def _html_table(title, headers, rows):
+    head = "".join(f"<th>{html.escape(str(header))}</th>" for header in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>"
+        for row in rows)
+    return f"<h2>{html.escape(title)}</h2><table><tr>{head}</tr>{body}</table>"
+
+def export_html(report, path):
+    """Write the report as a standalone HTML page."""
+    peak = max(int(report["heatmap"].max()), 1)
+    heat_rows = []
+    for day, row in zip(WEEKDAYS, report["heatmap"].tolist()):
+        cells = "".join(
+            f"<td style='background-color: rgba(33, 150, 243, {count / peak:.2f})'>{count}</td>"
+            for count in row)
+        heat_rows.append(f"<tr><th>{day}</th>{cells}</tr>")
+    hours = "".join(f"<th>{hour}</th>" for hour in range(24))
+
+    sections = [
+        f"<h1>Activity Report</h1><p>{report['start']:%Y-%m-%d} to {report['end']:%Y-%m-%d}: "
+        f"{report['total_visits']} visits, {report['blocked_attempts']} blocked attempts</p>",
+        _html_table("Top Websites", ["Website", "Visits"], report["top_domains"]),
+        f"<h2>Activity by Time of Day</h2><table><tr><th></th>{hours}</tr>{''.join(heat_rows)}</table>",
+        _html_table("New Websites", ["Website", "First Visit"],
+                    [(domain, f"{first_seen:%Y-%m-%d %H:%M}") for domain, first_seen in report["new_domains"]]),
+        _html_table("Blocked Attempts", ["Website", "Attempts"], report["top_blocked"]),
+        _html_table("Screen Time", ["Website", "Minutes"],
+                    [(domain, seconds // 60) for domain, seconds in report["screen_time"]])
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<html><head><meta charset='utf-8'><title>Activity Report</title>"
+                "<style>body { font-family: Arial; } table { border-collapse: collapse; } "
+                "td, th { border: 1px solid #e0e0e0; padding: 4px; }</style></head><body>")
+        f.write("".join(sections))
+        f.write("</body></html>")
@@ -0,0 +1,116 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+
+# Where a blocked navigation came from
+SOURCE_LINK = "link"
+SOURCE_TYPED = "typed"
+SOURCE_SUBRESOURCE = "subresource"
+SOURCE_CLASSIFIER = "classifier"
+
+AUDIT_LOG_FILE = 'blocked_log.jsonl'
+
+def load_audit_log(path=AUDIT_LOG_FILE):
+    """Load blocked navigation entries from the audit log, skipping damaged lines."""
+    entries = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+class AuditLogWriter(threading.Thread):
+    """
+    Appends block decisions to a JSON lines file from a background thread.
+    Blocks of the same host within `coalesce_window` seconds are merged into one entry with a count.
+    """
+
+    def __init__(self, path=AUDIT_LOG_FILE, max_queue=1000, batch_size=100,
+                 flush_interval=2.0, coalesce_window=30.0):
+        super().__init__(name="audit-log-writer", daemon=True)
+        self.path = path
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.coalesce_window = coalesce_window
+        self.dropped = 0
+        self.pending = {}
+        self.batch = []
+
+    def record(self, url, rule, source):
+        """Queue a block decision. Never blocks; entries are dropped if the writer falls behind."""
+        try:
+            self.queue.put_nowait((time.time(), url, rule, source))
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write everything still queued or being coalesced, then end the thread."""
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        last_write = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                break
+            if item:
+                self.add(*item)
+
+            self.close_expired(time.time())
+            if len(self.batch) >= self.batch_size or time.monotonic() - last_write >= self.flush_interval:
+                self.write_batch()
+                last_write = time.monotonic()
+
+        self.close_expired(float('inf'))
+        self.write_batch()
+
+    def add(self, timestamp, url, rule, source):
+        host = urlparse(url).hostname or url
+        entry = self.pending.get(host)
+        if entry is not None and timestamp - entry["first"] < self.coalesce_window:
+            entry["count"] += 1
+            entry["last"] = timestamp
+            return
+        if entry is not None:
+            self.batch.append(entry)
+        self.pending[host] = {"first": timestamp, "last": timestamp, "url": url, "host": host,
+                              "rule": rule, "source": source, "count": 1}
+
+    def close_expired(self, now):
+        """Move entries whose coalescing window has ended into the write batch."""
+        for host, entry in list(self.pending.items()):
+            if now - entry["first"] >= self.coalesce_window:
+                self.batch.append(entry)
+                del self.pending[host]
+
+    def write_batch(self):
+        if not self.batch:
+            return
+        lines = []
+        for entry in sorted(self.batch, key=lambda entry: entry["first"]):
+            lines.append(json.dumps({
+                "timestamp": datetime.fromtimestamp(entry["first"]).isoformat(),
+                "last_timestamp": datetime.fromtimestamp(entry["last"]).isoformat(),
+                "url": entry["url"],
+                "host": entry["host"],
+                "rule": entry["rule"],
+                "source": entry["source"],
+                "count": entry["count"]
+            }))
+        with open(self.path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+        self.batch = []
@@ -0,0 +1,104 @@
+import json
+import os
+import re
+from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage
+
+# Kid-safe search engine used as the home page
+HOME_URL = 'https://www.kiddle.co'
+
+DEFAULT_PROFILE_SETTINGS = {
+    "active_child": "default",
+    "cache_type": "disk",          # "disk" or "memory"
+    "cache_size_mb": 200,
+    "cache_dir": "browser_cache",
+    "preload_enabled": True,
+    "prefetch_enabled": True,      # Classify linked sites in the background
+    "preload_delay_ms": 5000,      # Wait this long after the last page load
+    "preload_sites": [
+        HOME_URL,
+        "https://kids.britannica.com",
+        "https://pbskids.org",
+        "https://kids.nationalgeographic.com"
+    ]
+}
+
+# Load or create browser profile settings
+def load_profile_settings():
+    try:
+        with open('browser_profile.json', 'r') as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        settings = {}
+        save_profile_settings(DEFAULT_PROFILE_SETTINGS)
+    # Fill in any keys missing from older settings files
+    return {**DEFAULT_PROFILE_SETTINGS, **settings}
+
+# Save browser profile settings
+def save_profile_settings(settings):
+    with open('browser_profile.json', 'w') as f:
+        json.dump(settings, f, indent=2)
+
+def active_child(settings):
+    """Return the name of the child whose profile is in use, as written in `profiles`."""
+    return os.environ.get('BROWSEBUDDY_CHILD') or settings.get("active_child") or "default"
+
+def create_profile(settings, parent=None):
+    """Create a persistent web profile with its own HTTP cache for the active child."""
+    # Only keep characters that are safe in a directory name
+    child = re.sub(r'[^A-Za-z0-9_-]', '_', active_child(settings))
+    profile = QWebEngineProfile(f"child-{child}", parent)
+
+    base_path = os.path.abspath(os.path.join(settings["cache_dir"], child))
+    profile.setCachePath(os.path.join(base_path, 'cache'))
+    profile.setPersistentStoragePath(os.path.join(base_path, 'storage'))
+
+    if settings["cache_type"] == "memory":
+        profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+    else:
+        profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+    profile.setHttpCacheMaximumSize(int(settings["cache_size_mb"]) * 1024 * 1024)
+    return profile
+
+class CachePreloader(QObject):
+    """Warms the HTTP cache by loading a list of sites in a hidden page while the browser is idle."""
+
+    def __init__(self, profile, sites, delay_ms=5000, is_busy=None, parent=None):
+        super().__init__(parent)
+        self.profile = profile
+        self.queue = list(sites)
+        self.delay_ms = delay_ms
+        self.is_busy = is_busy or (lambda: False)
+        self.page = None
+        self.started = False
+
+    def start(self):
+        """Begin preloading after the idle delay. Only the first call has any effect."""
+        if self.started or not self.queue:
+            return
+        self.started = True
+        QTimer.singleShot(self.delay_ms, self.load_next)
+
+    def load_next(self):
+        if not self.queue:
+            self.finish()
+            return
+
+        # Don't compete with the child's own page loads
+        if self.is_busy():
+            QTimer.singleShot(self.delay_ms, self.load_next)
+            return
+
+        if self.page is None:
+            self.page = QWebEnginePage(self.profile, self)
+            self.page.setAudioMuted(True)
+            self.page.loadFinished.connect(self.on_load_finished)
+        self.page.load(QUrl(self.queue.pop(0)))
+
+    def on_load_finished(self, ok):
+        QTimer.singleShot(self.delay_ms, self.load_next)
+
+    def finish(self):
+        if self.page is not None:
+            self.page.deleteLater()
+            self.page = None
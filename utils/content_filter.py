@@ -1,43 +1,133 @@
+import os
 import re
 from urllib.parse import urlparse
-from utils.parental_controls import load_parental_controls
+from utils.parental_controls import (load_parental_controls, save_parental_controls,
+                                     update_website_lists)
+from utils.policy_snapshot import open_snapshot
+from utils import tracing
 
 # List of profane words to filter
 profanity = []
 
-def is_safe_url(url, safe_mode=True):
+# Rules compiled from parental_controls.json, rebuilt when the file changes
+_compiled_rules = {"mtime": None, "blocked": frozenset(), "profile_blocked": frozenset(),
+                   "profile_allowed": frozenset()}
+
+# Child whose profile rules are layered over the shared base policy
+_active_profile = None
+
+def set_active_profile(name):
+    """Select the child profile whose rules apply on top of the base policy."""
+    global _active_profile, _compiled_rules
+    _active_profile = name
+    # Force the rules to be rebuilt for the new profile
+    _compiled_rules = {**_compiled_rules, "mtime": None}
+
+def _strip_www(domain):
+    domain = domain.lower()
+    if domain.startswith("www."):
+        domain = domain[4:]  # Remove 'www.'
+    return domain
+
+def _settings_mtime():
+    try:
+        return os.stat('parental_controls.json').st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _compile_rules(settings, mtime):
+    """
+    The base blocklist goes into a memory-mapped snapshot shared by every browser process.
+    The active child's profile adds its own, usually small, blocked and allowed sets.
+    """
+    profile = settings.get("profiles", {}).get(_active_profile, {})
+    return {
+        "mtime": mtime,
+        "blocked": open_snapshot([_strip_www(site) for site in settings.get("blocked_websites", [])]),
+        "profile_blocked": frozenset(_strip_www(site) for site in profile.get("blocked_websites", [])),
+        "profile_allowed": frozenset(_strip_www(site) for site in profile.get("allowed_websites", []))
+    }
+
+def _current_rules():
+    """Return the compiled rules, reloading settings only when the file has changed."""
+    global _compiled_rules
+    mtime = _settings_mtime()
+    rules = _compiled_rules
+    if mtime is None or mtime != rules["mtime"]:
+        with tracing.span("load_parental_controls"):
+            settings = load_parental_controls()
+        rules = _compiled_rules = _compile_rules(settings, mtime)
+    return rules
+
+def install_settings(settings):
+    """
+    Save new parental controls settings and swap in their compiled rules.
+    The rules are built before the swap, so this can run on a background thread
+    while navigation checks keep using the previous rules.
+    """
+    global _compiled_rules
+    rules = _compile_rules(settings, None)
+    save_parental_controls(settings)
+    update_website_lists(settings)
+    rules["mtime"] = _settings_mtime()
+    _compiled_rules = rules
+
+def _match_blocked(domain, sites):
+    """Return the entry in `sites` matching the domain or one of its parent domains, if any."""
+    while True:
+        if domain in sites:
+            return domain
+        dot = domain.find(".")
+        if dot < 0:
+            return None
+        domain = domain[dot + 1:]
+
+@tracing.traced("check_url")
+def check_url(url, safe_mode=True):
     """
     Check if a URL is safe by verifying its format and domain.
-    Returns False if the URL is in the blocked list and safe mode is enabled.
-    Otherwise, it returns True.
+    Returns (safe, rule) where rule describes why the URL was refused,
+    e.g. 'blocked:youtube.com' or 'scheme:ftp', and is None for safe URLs.
     """
     if not safe_mode:
-        return True  # Allow all URLs if safe mode is disabled
-    
-    # Reload settings each time to get latest blocked sites
-    settings = load_parental_controls()
-    blocked_websites = settings.get("blocked_websites", [])
-    allowed_websites = settings.get("allowed_websites", [])
-    
+        return True, None  # Allow all URLs if safe mode is disabled
+
     parsed_url = urlparse(url)
-    
+
     if not parsed_url.scheme in ("http", "https"):
-        return False  # Invalid URL scheme
-    
+        return False, f"scheme:{parsed_url.scheme}"  # Invalid URL scheme
+
     # Normalize netloc (convert to lowercase and remove 'www.')
-    domain = parsed_url.netloc.lower()
-    if domain.startswith("www."):
-        domain = domain[4:]  # Remove 'www.'
+    domain = _strip_www(parsed_url.netloc)
 
-    # Check if the domain is in blocked_websites
-    for blocked_site in blocked_websites:
-        blocked_domain = blocked_site.lower()
-        if blocked_domain.startswith("www."):
-            blocked_domain = blocked_domain[4:]
-        if domain == blocked_domain or domain.endswith("." + blocked_domain):
-            return False
+    # The child's own allowed sites override everything else
+    rules = _current_rules()
+    if rules["profile_allowed"] and _match_blocked(domain, rules["profile_allowed"]) is not None:
+        return True, None
 
-    return True  # Safe if not blocked
+    # Check if the domain or a parent domain is blocked for this child or for everyone
+    if rules["profile_blocked"]:
+        blocked_domain = _match_blocked(domain, rules["profile_blocked"])
+        if blocked_domain is not None:
+            return False, f"profile:{_active_profile}:blocked:{blocked_domain}"
+    blocked_domain = _match_blocked(domain, rules["blocked"])
+    if blocked_domain is not None:
+        return False, f"blocked:{blocked_domain}"
 
+    return True, None  # Safe if not blocked
 
+def is_explicitly_allowed(url):
+    """Return True if the active child's profile allows the URL's domain or a parent domain."""
+    rules = _current_rules()
+    if not rules["profile_allowed"]:
+        return False
+    domain = _strip_www(urlparse(url).netloc)
+    return _match_blocked(domain, rules["profile_allowed"]) is not None
 
+def is_safe_url(url, safe_mode=True):
+    """
+    Check if a URL is safe by verifying its format and domain.
+    Returns False if the URL is in the blocked list and safe mode is enabled.
+    Otherwise, it returns True.
+    """
+    return check_url(url, safe_mode)[0]
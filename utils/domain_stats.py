@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from array import array
+
+DOMAIN_USAGE_FILE = 'domain_usage.json'
+
+# Reports the size of the page and every resource loaded since the last call
+RESOURCE_SIZES_JS = """
+(function() {
+    var entries = performance.getEntriesByType('navigation')
+        .concat(performance.getEntriesByType('resource'));
+    performance.clearResourceTimings();
+    return entries.map(function(entry) { return [entry.name, entry.transferSize || 0]; });
+})()
+"""
+
+def normalize_host(host):
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+class DomainCounters:
+    """
+    Request, byte and blocked-request counts per domain. Domains map to small IDs that
+    index into flat unsigned arrays, so tracking thousands of sites stays compact.
+    Updated from the UI thread and the link prefetcher's workers; flushed to disk periodically.
+    """
+
+    def __init__(self, path=DOMAIN_USAGE_FILE):
+        self.path = path
+        self.ids = {}
+        self.names = []
+        self.requests = array('Q')
+        self.bytes = array('Q')
+        self.blocked = array('Q')
+        self.lock = threading.Lock()
+        self.dirty = False
+        # Bumped on every change so viewers can skip refreshing unchanged counters
+        self.version = 0
+        self.load()
+
+    def domain_id(self, domain):
+        # Caller holds the lock
+        domain_id = self.ids.get(domain)
+        if domain_id is None:
+            domain_id = len(self.names)
+            self.ids[domain] = domain_id
+            self.names.append(domain)
+            self.requests.append(0)
+            self.bytes.append(0)
+            self.blocked.append(0)
+        return domain_id
+
+    def add_request(self, host, blocked=False):
+        with self.lock:
+            domain_id = self.domain_id(normalize_host(host))
+            self.requests[domain_id] += 1
+            if blocked:
+                self.blocked[domain_id] += 1
+            self.dirty = True
+            self.version += 1
+
+    def add_blocked(self, host):
+        with self.lock:
+            self.blocked[self.domain_id(normalize_host(host))] += 1
+            self.dirty = True
+            self.version += 1
+
+    def add_bytes(self, host, size):
+        if size <= 0:
+            return
+        with self.lock:
+            self.bytes[self.domain_id(normalize_host(host))] += int(size)
+            self.dirty = True
+            self.version += 1
+
+    def add_download(self, host, size):
+        """Count a request the browser made outside the web view, e.g. link prefetching."""
+        with self.lock:
+            domain_id = self.domain_id(normalize_host(host))
+            self.requests[domain_id] += 1
+            self.bytes[domain_id] += int(size)
+            self.dirty = True
+            self.version += 1
+
+    def rows(self):
+        """Return (domain, requests, bytes, blocked) for every domain, in the order first seen."""
+        with self.lock:
+            return list(zip(self.names, self.requests, self.bytes, self.blocked))
+
+    def load(self):
+        """Load saved counters. A missing or damaged file starts the counters from empty."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            columns = [data["domains"], array('Q', data["requests"]),
+                       array('Q', data["bytes"]), array('Q', data["blocked"])]
+            if len({len(column) for column in columns}) != 1 or \
+                    not all(isinstance(domain, str) for domain in columns[0]):
+                return
+        except (FileNotFoundError, ValueError, KeyError, TypeError, OverflowError):
+            return
+        with self.lock:
+            for domain, requests, size, blocked in zip(*columns):
+                domain_id = self.domain_id(domain)
+                self.requests[domain_id] = requests
+                self.bytes[domain_id] = size
+                self.blocked[domain_id] = blocked
+
+    def flush(self):
+        """Write the counters to disk if anything changed since the last flush."""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {
+                "domains": list(self.names),
+                "requests": self.requests.tolist(),
+                "bytes": self.bytes.tolist(),
+                "blocked": self.blocked.tolist()
+            }
+            self.dirty = False
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(self.path + '.tmp', self.path)
@@ -0,0 +1,87 @@
+import json
+import os
+
+MODEL_NAME = "facebook/bart-large-mnli"
+
+DEFAULT_CLASSIFIER_CONFIG = {
+    "backend": "pytorch",                          # "pytorch", "quantized" or "onnx"
+    "model": MODEL_NAME,
+    "onnx_model_dir": "models/bart-large-mnli-onnx",
+    "onnx_quantize": True,                         # int8 weights for the ONNX model
+    "threads": 0                                   # 0 lets the runtime decide
+}
+
+# Load classifier settings (no file means the default PyTorch backend)
+def load_classifier_config():
+    try:
+        with open('classifier_config.json', 'r') as f:
+            config = {**DEFAULT_CLASSIFIER_CONFIG, **json.load(f)}
+    except FileNotFoundError:
+        config = dict(DEFAULT_CLASSIFIER_CONFIG)
+    config["backend"] = os.environ.get('BROWSEBUDDY_CLASSIFIER_BACKEND', config["backend"])
+    return config
+
+def create_pytorch_backend(config):
+    """Full precision PyTorch pipeline."""
+    from transformers import pipeline
+    if config["threads"]:
+        import torch
+        torch.set_num_threads(config["threads"])
+    return pipeline("zero-shot-classification", model=config["model"])
+
+def create_quantized_backend(config):
+    """PyTorch pipeline with int8 dynamically quantized linear layers."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+    if config["threads"]:
+        torch.set_num_threads(config["threads"])
+    model = AutoModelForSequenceClassification.from_pretrained(config["model"])
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    tokenizer = AutoTokenizer.from_pretrained(config["model"])
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
+def create_onnx_backend(config):
+    """ONNX Runtime pipeline. The model is exported (and optionally quantized) on first use."""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    model_dir = config["onnx_model_dir"]
+    if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+        model = ORTModelForSequenceClassification.from_pretrained(config["model"], export=True)
+        model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(config["model"]).save_pretrained(model_dir)
+
+    file_name = "model.onnx"
+    if config["onnx_quantize"]:
+        file_name = "model_quantized.onnx"
+        if not os.path.exists(os.path.join(model_dir, file_name)):
+            quantizer = ORTQuantizer.from_pretrained(model_dir, file_name="model.onnx")
+            quantizer.quantize(save_dir=model_dir,
+                               quantization_config=AutoQuantizationConfig.avx2(is_static=False))
+
+    session_options = onnxruntime.SessionOptions()
+    if config["threads"]:
+        session_options.intra_op_num_threads = config["threads"]
+    model = ORTModelForSequenceClassification.from_pretrained(model_dir, file_name=file_name,
+                                                              session_options=session_options)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
+BACKENDS = {
+    "pytorch": create_pytorch_backend,
+    "quantized": create_quantized_backend,
+    "onnx": create_onnx_backend
+}
+
+def create_backend(config):
+    """
+    Create the zero-shot classifier for the configured backend. Every backend is called as
+    backend(text, candidate_labels) and returns {"labels": [...], "scores": [...]}, best first.
+    """
+    try:
+        factory = BACKENDS[config["backend"]]
+    except KeyError:
+        raise ValueError(f"Unknown classifier backend: {config['backend']}")
+    return factory(config)
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from utils.content_filter import check_url, is_explicitly_allowed
+
+# Classifier labels that make a site unsafe for children
+UNSAFE_LABELS = ("adult", "violent")
+
+# Collects the outbound links of the rendered page
+EXTRACT_LINKS_JS = "Array.from(document.links, a => a.href).slice(0, 200)"
+
+class LinkPrefetcher:
+    """
+    Works out verdicts for the domains linked from the current page before the child clicks.
+    The blocklist is consulted first. Only domains it allows, and that the child's profile
+    doesn't explicitly allow, are classified from their home page (never the linked page
+    itself, which may log out or unsubscribe), by a small worker pool with a cap on queued
+    work and on bytes downloaded per second. `record_bytes(domain, size)` is told about
+    every download.
+    """
+
+    def __init__(self, classify=None, fetch_text=None, max_workers=1, max_pending=20,
+                 max_bytes=100000, bytes_per_second=50000, cache_size=2000, ttl=3600,
+                 record_bytes=None):
+        self.classify = classify
+        self.fetch_text = fetch_text
+        self.record_bytes = record_bytes
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.bytes_per_second = bytes_per_second
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.verdicts = OrderedDict()
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.next_fetch_at = 0.0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    def verdict(self, url):
+        """Return the cached verdict for the URL's domain: a classifier label, 'blocked' or None if unknown."""
+        domain = self.domain_of(url)
+        with self.lock:
+            entry = self.verdicts.get(domain)
+            if entry is None:
+                return None
+            label, scored_at = entry
+            if time.monotonic() - scored_at > self.ttl:
+                del self.verdicts[domain]
+                return None
+            self.verdicts.move_to_end(domain)
+            return label
+
+    def submit(self, urls):
+        """Queue the domains of `urls` for scoring. Cheap enough to call from the UI thread."""
+        if not urls:
+            return
+        seen = set()
+        for url in urls:
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+                continue
+            domain = self.domain_of(url)
+            if domain in seen:
+                continue
+            seen.add(domain)
+            with self.lock:
+                if domain in self.verdicts or domain in self.in_flight:
+                    continue
+
+            safe, rule = check_url(url)
+            if not safe:
+                self.store(domain, "blocked")
+                continue
+            if self.classify is None or self.fetch_text is None or is_explicitly_allowed(url):
+                continue
+
+            with self.lock:
+                if len(self.in_flight) >= self.max_pending:
+                    return
+                self.in_flight.add(domain)
+            self.executor.submit(self.score, domain, f"{parsed.scheme}://{parsed.netloc}/")
+
+    def score(self, domain, url):
+        """Classify the domain from `url`, its home page."""
+        try:
+            self.throttle()
+            if self.record_bytes is None:
+                text = self.fetch_text(url, self.max_bytes)
+            else:
+                text = self.fetch_text(url, self.max_bytes,
+                                       on_download=lambda size: self.record_bytes(domain, size))
+            self.store(domain, self.classify(text))
+        except ImportError:
+            # Classifier dependencies aren't installed; keep using the blocklist alone
+            self.classify = None
+        except Exception:
+            # Unreachable or unparsable pages stay unscored and are checked normally on click
+            pass
+        finally:
+            with self.lock:
+                self.in_flight.discard(domain)
+
+    def throttle(self):
+        """Space fetches out so prefetching stays under bytes_per_second."""
+        with self.lock:
+            now = time.monotonic()
+            start_at = max(now, self.next_fetch_at)
+            # Budget for the largest response we allow
+            self.next_fetch_at = start_at + self.max_bytes / self.bytes_per_second
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def store(self, domain, label):
+        with self.lock:
+            self.verdicts[domain] = (label, time.monotonic())
+            self.verdicts.move_to_end(domain)
+            while len(self.verdicts) > self.cache_size:
+                self.verdicts.popitem(last=False)
+
+    def domain_of(self, url):
+        domain = urlparse(url).netloc.lower()
+        return domain[4:] if domain.startswith("www.") else domain
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
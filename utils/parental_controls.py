@@ -1,8 +1,15 @@
 import json
+import os
+import tempfile
+import threading
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QPushButton, QListWidget, 
                            QLineEdit, QLabel, QMessageBox, QHBoxLayout, QGroupBox)
 from urllib.parse import urlparse
 
+# Held while parental_controls.json is loaded, changed and saved, so the Parental Controls
+# dialog and policy sync (on its own thread) don't save over each other's changes
+settings_lock = threading.Lock()
+
 # Load or create parental controls settings
 def load_parental_controls():
     try:
@@ -20,14 +27,45 @@ def load_parental_controls():
 
 # Save parental controls settings
 def save_parental_controls(settings):
-    with open('parental_controls.json', 'w') as f:
-        json.dump(settings, f, indent=2)
+    # Write to a temporary file first so readers never see a half-written file.
+    # Each save gets its own temporary file, as policy sync saves from a background thread.
+    fd, tmp_path = tempfile.mkstemp(prefix='parental_controls.', suffix='.tmp', dir='.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp_path, 'parental_controls.json')
+    except BaseException:
+        os.remove(tmp_path)
+        raise
 
 # Global variables for blocked and allowed websites
 settings = load_parental_controls()
 blocked_websites = settings.get("blocked_websites", [])
 allowed_websites = settings.get("allowed_websites", [])
 
+def update_website_lists(settings):
+    """Replace the contents of the global website lists, e.g. after a policy update."""
+    blocked_websites[:] = settings.get("blocked_websites", [])
+    allowed_websites[:] = settings.get("allowed_websites", [])
+
+def set_website_blocked(domain, blocked):
+    """
+    Add the domain to, or remove it from, the shared blocklist and save it, keeping child
+    profiles and other settings in the file. Returns False if the list already said so.
+    """
+    with settings_lock:
+        settings = load_parental_controls()
+        sites = settings.setdefault("blocked_websites", [])
+        if (domain in sites) == blocked:
+            return False
+        if blocked:
+            sites.append(domain)
+        else:
+            sites.remove(domain)
+        save_parental_controls(settings)
+        update_website_lists(settings)
+    return True
+
 def normalize_domain(url):
     """Convert any URL input to a normalized domain name."""
     # Remove any protocol prefix if present
@@ -185,12 +223,7 @@ class ParentalControlsDialog(QDialog):
         url = self.block_input.text().strip()
         if url:
             normalized_domain = normalize_domain(url)
-            if normalized_domain not in blocked_websites:
-                blocked_websites.append(normalized_domain)
-                save_parental_controls({
-                    "blocked_websites": blocked_websites,
-                    "allowed_websites": allowed_websites
-                })
+            if set_website_blocked(normalized_domain, True):
                 self.update_blocked_list()
                 QMessageBox.information(self, "Blocked", f"{normalized_domain} has been blocked.")
             else:
@@ -203,12 +236,7 @@ class ParentalControlsDialog(QDialog):
         url = self.block_input.text().strip()
         if url:
             normalized_domain = normalize_domain(url)
-            if normalized_domain in blocked_websites:
-                blocked_websites.remove(normalized_domain)
-                save_parental_controls({
-                    "blocked_websites": blocked_websites,
-                    "allowed_websites": allowed_websites
-                })
+            if set_website_blocked(normalized_domain, False):
                 self.update_blocked_list()
                 QMessageBox.information(self, "Allowed", f"{normalized_domain} has been allowed.")
             else:
@@ -0,0 +1,100 @@
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+SNAPSHOT_DIR = 'policy_snapshots'
+MAGIC = b'BBPS'
+FORMAT_VERSION = 1
+
+# magic, format version, domain count, hash table size
+HEADER = struct.Struct('<4sIII')
+UINT32 = struct.Struct('<I')
+UINT32_PAIR = struct.Struct('<II')
+
+def snapshot_key(domains):
+    """Fingerprint of a blocklist, used to name its snapshot file."""
+    return hashlib.sha1("\n".join(domains).encode('utf-8')).hexdigest()[:16]
+
+def write_snapshot(domains, path):
+    """
+    Write an immutable blocklist snapshot: a header, the end offset of every domain,
+    an open-addressing hash table of domain numbers and the UTF-8 domain names.
+    """
+    encoded = sorted(set(domain.encode('utf-8') for domain in domains))
+    table_size = 8
+    while table_size < 2 * len(encoded):
+        table_size *= 2
+
+    slots = [0] * table_size
+    for number, key in enumerate(encoded):
+        slot = zlib.crc32(key) & (table_size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (table_size - 1)
+        slots[slot] = number + 1
+
+    offsets = [0]
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+
+    # Write under a private name, then move into place so readers never see a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded), table_size))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(struct.pack(f'<{table_size}I', *slots))
+        f.write(b''.join(encoded))
+    try:
+        os.replace(temp_path, path)
+    except OSError:
+        # Another process published the same snapshot first and has it open
+        os.remove(temp_path)
+
+class PolicySnapshot:
+    """
+    Read-only, memory-mapped set of blocked domains. All browser processes on the machine
+    map the same file, so the operating system keeps a single copy of it in memory.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.table_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a policy snapshot")
+        self.offsets_start = HEADER.size
+        self.slots_start = self.offsets_start + 4 * (self.count + 1)
+        self.names_start = self.slots_start + 4 * self.table_size
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, domain):
+        key = domain.encode('utf-8')
+        mask = self.table_size - 1
+        slot = zlib.crc32(key) & mask
+        while True:
+            number = UINT32.unpack_from(self.map, self.slots_start + 4 * slot)[0]
+            if number == 0:
+                return False
+            start, end = UINT32_PAIR.unpack_from(self.map, self.offsets_start + 4 * (number - 1))
+            if self.map[self.names_start + start:self.names_start + end] == key:
+                return True
+            slot = (slot + 1) & mask
+
+def open_snapshot(domains, directory=SNAPSHOT_DIR):
+    """Map the snapshot for this blocklist, building it first if no process has yet."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"base_{snapshot_key(domains)}.bin"
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        write_snapshot(domains, path)
+        # Old snapshots can go once nothing maps them (removal fails on Windows until then)
+        for old_name in os.listdir(directory):
+            if old_name.startswith('base_') and old_name.endswith('.bin') and old_name != name:
+                try:
+                    os.remove(os.path.join(directory, old_name))
+                except OSError:
+                    pass
+    return PolicySnapshot(path)
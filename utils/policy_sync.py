@@ -0,0 +1,149 @@
+import gzip
+import json
+import random
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+from utils.parental_controls import load_parental_controls, settings_lock
+from utils.content_filter import install_settings
+
+DEFAULT_SYNC_CONFIG = {
+    "url": "",              # Policy server endpoint; syncing is off while empty
+    "interval": 300,        # Seconds between checks
+    "max_backoff": 3600,    # Longest wait after repeated failures
+    "timeout": 10
+}
+
+POLICY_KEYS = ("blocked_websites", "allowed_websites")
+
+# Load policy sync settings (no file means syncing is off)
+def load_sync_config():
+    try:
+        with open('policy_sync.json', 'r') as f:
+            return {**DEFAULT_SYNC_CONFIG, **json.load(f)}
+    except FileNotFoundError:
+        return dict(DEFAULT_SYNC_CONFIG)
+
+def load_sync_state():
+    """Load the version and cache validators of the last policy received."""
+    try:
+        with open('policy_sync_state.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": None, "etag": None, "last_modified": None}
+
+def save_sync_state(state):
+    with open('policy_sync_state.json', 'w') as f:
+        json.dump(state, f, indent=2)
+
+def validate_policy_update(update):
+    """Raise ValueError unless the update has the shape apply_policy_update expects."""
+    if not isinstance(update, dict):
+        raise ValueError("Policy update is not an object")
+    for key in POLICY_KEYS:
+        if key not in update:
+            continue
+        if "base_version" in update:
+            if not isinstance(update[key], dict):
+                raise ValueError(f"Delta for {key} is not an object")
+            lists = [update[key].get("add", []), update[key].get("remove", [])]
+        else:
+            lists = [update[key]]
+        for sites in lists:
+            if not isinstance(sites, list) or not all(isinstance(site, str) for site in sites):
+                raise ValueError(f"{key} is not a list of websites")
+
+def apply_policy_update(settings, update):
+    """
+    Return new settings with a policy update applied. An update is either a full policy
+    ({"version", "blocked_websites", "allowed_websites"}) or a delta against `base_version`
+    ({"version", "base_version", "blocked_websites": {"add": [...], "remove": [...]}, ...}).
+    Settings that are not part of the policy are kept.
+    """
+    new_settings = dict(settings)
+    for key in POLICY_KEYS:
+        if key not in update:
+            continue
+        if "base_version" in update:
+            removed = set(update[key].get("remove", []))
+            current = [site for site in settings.get(key, []) if site not in removed]
+            present = set(current)
+            current.extend(site for site in update[key].get("add", []) if site not in present)
+            new_settings[key] = current
+        else:
+            new_settings[key] = list(update[key])
+    return new_settings
+
+class PolicySyncClient(threading.Thread):
+    """Polls the policy server in the background and installs policy updates as they arrive."""
+
+    def __init__(self, config):
+        super().__init__(name="policy-sync", daemon=True)
+        self.config = config
+        self.state = load_sync_state()
+        self.failures = 0
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.sync_once()
+                self.failures = 0
+                delay = self.config["interval"]
+            except Exception:
+                # Server unreachable, sent something unusable or broke off mid-response:
+                # back off exponentially rather than letting the thread die
+                self.failures += 1
+                delay = min(self.config["interval"] * 2 ** self.failures, self.config["max_backoff"])
+                delay *= random.uniform(0.8, 1.2)
+            self.stop_event.wait(delay)
+
+    def fetch(self, full=False):
+        """Request the policy. Returns None if it has not changed since the last sync."""
+        url = self.config["url"]
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+        if not full and self.state["version"] is not None:
+            # Ask for a delta against our version, or nothing at all if we're up to date
+            url += ("&" if "?" in url else "?") + urlencode({"since": self.state["version"]})
+            if self.state["etag"]:
+                headers["If-None-Match"] = self.state["etag"]
+            if self.state["last_modified"]:
+                headers["If-Modified-Since"] = self.state["last_modified"]
+
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.config["timeout"]) as response:
+                body = response.read()
+                if response.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                return json.loads(body), response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as error:
+            if error.code == 304:
+                return None
+            raise
+
+    def sync_once(self):
+        """Check the server once. Returns True if a new policy was installed."""
+        result = self.fetch()
+        if result is None:
+            return False
+        update, etag, last_modified = result
+        validate_policy_update(update)
+
+        if "base_version" in update and update["base_version"] != self.state["version"]:
+            # The delta doesn't apply to what we have, so start over from the full policy
+            result = self.fetch(full=True)
+            if result is None:
+                raise ValueError("No full policy returned")
+            update, etag, last_modified = result
+            validate_policy_update(update)
+
+        with settings_lock:
+            install_settings(apply_policy_update(load_parental_controls(), update))
+        self.state = {"version": update.get("version"), "etag": etag, "last_modified": last_modified}
+        save_sync_state(self.state)
+        return True
@@ -1,54 +1,173 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, 
-                           QLabel, QPushButton, QHBoxLayout)
+                           QLabel, QPushButton, QHBoxLayout, QTabWidget, QWidget,
+                           QGroupBox, QFileDialog, QMessageBox)
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QColor
 from datetime import datetime, timedelta
+import threading
+from utils.analytics import ReportBuilder, WEEKDAYS, export_csv, export_html
+from utils.table_models import KeyedTableModel, FilterableTable, format_duration
 
 class ScreenTimeDialog(QDialog):
-    def __init__(self, screen_time_data, parent=None):
+    # Delivers the weekly report from the thread that builds it
+    report_ready = pyqtSignal(object)
+    
+    def __init__(self, screen_time_data, parent=None, history=None, blocked_events=None,
+                 report_builder=None, load_blocked_events=None):
         super().__init__(parent)
         self.setWindowTitle("Screen Time Details")
-        self.setGeometry(200, 200, 600, 400)
+        self.setGeometry(200, 200, 700, 500)
         
         # Create layout
-        layout = QVBoxLayout()
+        dialog_layout = QVBoxLayout()
+        self.tabs = QTabWidget()
+        screen_time_tab = QWidget()
+        layout = QVBoxLayout(screen_time_tab)
+        self.tabs.addTab(screen_time_tab, "Screen Time")
+        dialog_layout.addWidget(self.tabs)
         
         # Add total screen time label
-        total_time = sum(screen_time_data.values())
-        hours = total_time // 3600
-        minutes = (total_time % 3600) // 60
-        total_label = QLabel(f"Total Screen Time: {hours} hours {minutes} minutes")
-        layout.addWidget(total_label)
+        self.total_label = QLabel()
+        layout.addWidget(self.total_label)
         
         # Create table for detailed breakdown
-        self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Website", "Time Spent"])
-        self.table.horizontalHeader().setStretchLastSection(True)
+        self.model = KeyedTableModel(["Website", "Time Spent"], {1: format_duration}, self)
+        self.table = FilterableTable(self.model)
         layout.addWidget(self.table)
         
         # Add data to table
+        self.screen_time_data = screen_time_data
         self.update_table(screen_time_data)
         
+        # The browser keeps adding to screen_time_data while the dialog is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(lambda: self.update_table(self.screen_time_data))
+        self.refresh_timer.start(2000)
+        
+        # Weekly report tab, only when history is available. The report is built in the
+        # background the first time the tab is opened, as it reads the whole history and audit log.
+        self.report = None
+        self.report_thread = None
+        if history is not None:
+            self.history = history
+            self.blocked_events = blocked_events
+            self.load_blocked_events = load_blocked_events
+            self.report_builder = report_builder or ReportBuilder()
+            self.report_tab = QWidget()
+            self.report_status = QLabel("Building report...")
+            QVBoxLayout(self.report_tab).addWidget(self.report_status)
+            self.tabs.addTab(self.report_tab, "Weekly Report")
+            self.tabs.currentChanged.connect(self.on_tab_changed)
+            self.report_ready.connect(self.show_report)
+        
         # Add close button
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
-        layout.addWidget(close_btn)
+        dialog_layout.addWidget(close_btn)
+        
+        self.setLayout(dialog_layout)
+    
+    def on_tab_changed(self, index):
+        if self.report_thread is not None or self.tabs.widget(index) is not self.report_tab:
+            return
+        # Screen time keeps changing on the UI thread, so the report works from a copy
+        self.report_thread = threading.Thread(target=self.build_report, args=(dict(self.screen_time_data),),
+                                              name="weekly-report", daemon=True)
+        self.report_thread.start()
+    
+    def build_report(self, screen_time_data):
+        """Runs on the report thread."""
+        try:
+            blocked_events = self.blocked_events
+            if blocked_events is None and self.load_blocked_events is not None:
+                blocked_events = self.load_blocked_events()
+            report = self.report_builder.build(self.history, screen_time_data, blocked_events)
+        except Exception:
+            report = None
+        self.report_ready.emit(report)
+    
+    def show_report(self, report):
+        if report is None:
+            self.report_status.setText("The weekly report could not be built.")
+            return
+        self.report = report
+        self.report_status.hide()
+        self.create_report_tab(report, self.report_tab)
+    
+    def create_report_tab(self, report, tab):
+        """Fill the weekly activity report tab."""
+        layout = tab.layout()
+        
+        summary = QLabel(f"{report['start']:%d %b} - {report['end']:%d %b}: "
+                         f"{report['total_visits']} visits, "
+                         f"{len(report['new_domains'])} new websites, "
+                         f"{report['blocked_attempts']} blocked attempts")
+        layout.addWidget(summary)
+        
+        # Top websites and blocked attempts side by side
+        columns_layout = QHBoxLayout()
+        columns_layout.addWidget(self.create_list_group("Top Websites", "Visits", report["top_domains"]))
+        columns_layout.addWidget(self.create_list_group(
+            "New Websites", "First Visit",
+            [(domain, f"{first_seen:%a %H:%M}") for domain, first_seen in report["new_domains"]]))
+        columns_layout.addWidget(self.create_list_group("Blocked Attempts", "Attempts", report["top_blocked"]))
+        layout.addLayout(columns_layout)
         
-        self.setLayout(layout)
+        # Time of day heatmap
+        heatmap_group = QGroupBox("Activity by Time of Day")
+        heatmap_layout = QVBoxLayout()
+        heatmap = QTableWidget(7, 24)
+        heatmap.setVerticalHeaderLabels(WEEKDAYS)
+        heatmap.setHorizontalHeaderLabels([str(hour) for hour in range(24)])
+        heatmap.horizontalHeader().setDefaultSectionSize(24)
+        peak = max(int(report["heatmap"].max()), 1)
+        for day, row in enumerate(report["heatmap"].tolist()):
+            for hour, count in enumerate(row):
+                item = QTableWidgetItem(str(count) if count else "")
+                item.setBackground(QColor(33, 150, 243, int(255 * count / peak)))
+                heatmap.setItem(day, hour, item)
+        heatmap_layout.addWidget(heatmap)
+        heatmap_group.setLayout(heatmap_layout)
+        layout.addWidget(heatmap_group)
+        
+        # Export buttons
+        export_layout = QHBoxLayout()
+        csv_btn = QPushButton("Export CSV")
+        csv_btn.clicked.connect(lambda: self.export_report("CSV Files (*.csv)", export_csv))
+        html_btn = QPushButton("Export HTML")
+        html_btn.clicked.connect(lambda: self.export_report("HTML Files (*.html)", export_html))
+        export_layout.addWidget(csv_btn)
+        export_layout.addWidget(html_btn)
+        layout.addLayout(export_layout)
+    
+    def create_list_group(self, title, value_header, rows):
+        """Create a group box with a two column table of (website, value) rows."""
+        group = QGroupBox(title)
+        group_layout = QVBoxLayout()
+        table = QTableWidget(len(rows), 2)
+        table.setHorizontalHeaderLabels(["Website", value_header])
+        table.horizontalHeader().setStretchLastSection(True)
+        for row, (domain, value) in enumerate(rows):
+            table.setItem(row, 0, QTableWidgetItem(domain))
+            table.setItem(row, 1, QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+        group_layout.addWidget(table)
+        group.setLayout(group_layout)
+        return group
+    
+    def export_report(self, file_filter, exporter):
+        """Save the weekly report using the given exporter."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Report", "", file_filter)
+        if path:
+            exporter(self.report, path)
+            QMessageBox.information(self, "Exported", f"Report saved to {path}")
     
     def update_table(self, screen_time_data):
-        """Update the table with screen time data."""
-        self.table.setRowCount(len(screen_time_data))
-        
-        for row, (site, seconds) in enumerate(screen_time_data.items()):
-            # Website name
-            site_item = QTableWidgetItem(site)
-            self.table.setItem(row, 0, site_item)
-            
-            # Time spent
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            time_str = f"{hours}h {minutes}m"
-            time_item = QTableWidgetItem(time_str)
-            self.table.setItem(row, 1, time_item)
-        
-        self.table.resizeColumnsToContents() 
\ No newline at end of file
+        """Update the table with screen time data. Only sites whose time changed are redrawn."""
+        if not self.model.update(screen_time_data.items()) and self.total_label.text():
+            return
+        
+        total_time = sum(screen_time_data.values())
+        hours = total_time // 3600
+        minutes = (total_time % 3600) // 60
+        self.total_label.setText(f"Total Screen Time: {hours} hours {minutes} minutes") 
\ No newline at end of file
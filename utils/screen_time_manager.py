@@ -0,0 +1,14 @@
+import json
+
+def load_screen_time():
+    """Load screen time data from file."""
+    try:
+        with open('screen_time.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_screen_time(data):
+    """Save screen time data to file."""
+    with open('screen_time.json', 'w') as f:
+        json.dump(data, f, indent=2)
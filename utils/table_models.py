@@ -0,0 +1,116 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLineEdit, QTableView, QAbstractItemView,
+                             QHeaderView)
+
+# Role holding the raw value of a cell, used for sorting
+SORT_ROLE = Qt.UserRole
+
+def format_duration(seconds):
+    return f"{seconds // 3600}h {(seconds % 3600) // 60}m"
+
+def format_megabytes(size):
+    return f"{size / (1024*1024):.2f} MB"
+
+class KeyedTableModel(QAbstractTableModel):
+    """
+    Table of rows keyed by their first column (usually a website). update() compares the
+    new values with the current ones and only signals the rows that changed or were added,
+    so attached views repaint just those rows. Cells are formatted when a view asks for
+    them, which means only the visible rows are ever formatted.
+    """
+
+    def __init__(self, headers, formatters=None, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.formatters = formatters or {}
+        self.rows = []
+        self.row_of = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            formatter = self.formatters.get(index.column())
+            return formatter(value) if formatter else str(value)
+        if role == SORT_ROLE:
+            return value
+        if role == Qt.TextAlignmentRole and index.column() > 0:
+            return Qt.AlignRight | Qt.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def update(self, rows):
+        """Merge (key, value, ...) rows into the table. Rows that aren't passed are kept."""
+        changed = []
+        added = []
+        for row in rows:
+            row = tuple(row)
+            position = self.row_of.get(row[0])
+            if position is None:
+                added.append(row)
+            elif self.rows[position] != row:
+                self.rows[position] = row
+                changed.append(position)
+
+        # One signal per run of neighbouring rows
+        changed.sort()
+        last_column = len(self.headers) - 1
+        start = 0
+        for i in range(1, len(changed) + 1):
+            if i == len(changed) or changed[i] != changed[i - 1] + 1:
+                self.dataChanged.emit(self.index(changed[start], 0),
+                                      self.index(changed[i - 1], last_column))
+                start = i
+
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for position, row in enumerate(added, first):
+                self.row_of[row[0]] = position
+                self.rows.append(row)
+            self.endInsertRows()
+        return len(changed) + len(added)
+
+class FilterableTable(QWidget):
+    """A sortable table view over a KeyedTableModel with a filter box for the first column."""
+
+    def __init__(self, model, placeholder="Filter websites...", sort_column=1, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(model)
+        self.proxy.setSortRole(SORT_ROLE)
+        self.proxy.setFilterKeyColumn(0)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.proxy.setDynamicSortFilter(True)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText(placeholder)
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.proxy.setFilterFixedString)
+        layout.addWidget(self.filter_input)
+
+        self.view = QTableView()
+        self.view.setModel(self.proxy)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(sort_column, Qt.DescendingOrder)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.verticalHeader().setVisible(False)
+        # Fixed row heights so the view never measures every row
+        self.view.verticalHeader().setDefaultSectionSize(24)
+        self.view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.view)
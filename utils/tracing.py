@@ -0,0 +1,146 @@
+import collections
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+# Tracing is off unless turned on here or from the Performance Metrics dialog
+_enabled = bool(os.environ.get('BROWSEBUDDY_TRACE'))
+_events = collections.deque(maxlen=20000)
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        add_span(self.name, self.start, time.perf_counter(), **self.args)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def enable(capacity=None):
+    """Start recording spans. `capacity` resizes the ring buffer (dropping what it holds)."""
+    global _enabled, _events
+    if capacity is not None and capacity != _events.maxlen:
+        _events = collections.deque(maxlen=capacity)
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def clear():
+    _events.clear()
+
+def span(name, **args):
+    """Context manager timing a stage of the navigation pipeline. Does nothing while disabled."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, args)
+
+def traced(name):
+    """Decorator recording a span for every call of the wrapped function."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Span(name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def add_span(name, start, end, **args):
+    """Record a span from explicit time.perf_counter() readings, e.g. for a page load spanning two signals."""
+    if _enabled:
+        _events.append((name, start, end - start, threading.get_ident(), args))
+
+def export_chrome_trace(path):
+    """Write the recorded spans in the Chrome trace event format (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    events = [
+        {
+            "name": name,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": duration * 1e6,
+            "pid": pid,
+            "tid": tid,
+            "args": {key: str(value) for key, value in args.items()}
+        }
+        for name, start, duration, tid, args in list(_events)
+    ]
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+class SamplingProfiler:
+    """Samples the main thread's stack from a background thread and keeps the last `window` seconds."""
+
+    def __init__(self, interval=0.005, window=300):
+        self.interval = interval
+        self.samples = collections.deque(maxlen=int(window / interval))
+        self.thread_id = threading.main_thread().ident
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples.append((time.monotonic(), ";".join(reversed(stack))))
+
+    def dump_collapsed(self, path, seconds=30):
+        """Write the samples of the last `seconds` in collapsed-stack format for flamegraph tools."""
+        cutoff = time.monotonic() - seconds
+        counts = collections.Counter(stack for taken_at, stack in list(self.samples) if taken_at >= cutoff)
+        with open(path, 'w') as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(counts.values())
+
+# Shared so the profiler keeps running when the metrics dialog is closed
+profiler = SamplingProfiler()
@@ -0,0 +1,81 @@
+import re
+import threading
+import zlib
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+
+class VerdictIndex:
+    """
+    Remembers the verdicts of classified pages so near-duplicates (templated pages,
+    mirror sites) can reuse them instead of running the classifier again.
+    Pages are compared by cosine similarity of hashed word n-gram sketches; the index
+    holds at most `capacity` pages and evicts the least recently used one when full.
+    """
+
+    def __init__(self, capacity=5000, dimensions=512, threshold=0.9, ngram=3):
+        self.capacity = capacity
+        self.dimensions = dimensions
+        self.threshold = threshold
+        self.ngram = ngram
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.labels = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self.clock = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        """Forget every remembered verdict."""
+        with self.lock:
+            self.size = 0
+            self.last_used[:] = 0
+
+    def sketch(self, text):
+        """Return a unit-length feature-hashed vector of the text's word n-grams."""
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) >= self.ngram:
+            shingles = [" ".join(words[i:i + self.ngram]) for i in range(len(words) - self.ngram + 1)]
+        else:
+            shingles = words
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if not shingles:
+            return vector
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                             dtype=np.uint32, count=len(shingles))
+        # The top bit picks the sign so hash collisions tend to cancel out
+        signs = np.where(hashes >> 31, -1.0, 1.0)
+        vector += np.bincount(hashes % self.dimensions, weights=signs, minlength=self.dimensions)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector):
+        """Return the verdict of the most similar known page, or None if none is similar enough."""
+        with self.lock:
+            if self.size == 0 or not vector.any():
+                return None
+            similarities = self.vectors[:self.size] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self.clock += 1
+            self.last_used[best] = self.clock
+            return self.labels[best]
+
+    def add(self, vector, label):
+        """Remember the verdict for a page sketch, evicting the least recently used page if full."""
+        if not vector.any():
+            return
+        with self.lock:
+            if self.size < self.capacity:
+                row = self.size
+                self.size += 1
+            else:
+                row = int(np.argmin(self.last_used))
+            self.clock += 1
+            self.vectors[row] = vector
+            self.labels[row] = label
+            self.last_used[row] = self.clock